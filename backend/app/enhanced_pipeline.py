@@ -1,6 +1,5 @@
 import os, io, math, tempfile
 from typing import Dict, List, Tuple, Optional
-import signal
 import time
 import re
 from faster_whisper import WhisperModel
@@ -11,7 +10,8 @@ import webrtcvad
 import soundfile as sf
 import numpy as np
 from .pii import redact
-from .voice_analysis import VoiceAnalyzer, IndianLanguageDetector, AdvancedInsightsGenerator
+from .voice_analysis import VoiceAnalyzer, IndianLanguageDetector, AdvancedInsightsGenerator, SpeakerBatch, SpeakerInfo
+from .pipeline_common import resample
 
 # Model cache (lazy loading)
 _whisper_model = None
@@ -23,12 +23,6 @@ _voice_analyzer = None
 _language_detector = None
 _insights_generator = None
 
-class TimeoutError(Exception):
-    pass
-
-def timeout_handler(signum, frame):
-    raise TimeoutError("Operation timed out")
-
 def load_whisper(size="base", device="auto"):
     global _whisper_model
     if _whisper_model is None:
@@ -115,15 +109,14 @@ def load_translator(model_name="Helsinki-NLP/opus-mt-en-hi"):
 def webrtc_vad_segments(wav_path: str, sample_rate=16000, frame_ms=30) -> List[Tuple[float,float]]:
     """Enhanced VAD with better segment detection"""
     try:
-        audio, sr = sf.read(wav_path)
-        if sr != sample_rate:
-            import librosa
-            audio = librosa.resample(audio, orig_sr=sr, target_sr=sample_rate)
-            sr = sample_rate
-        
+        audio, sr = sf.read(wav_path, dtype="float32")
         if audio.ndim > 1:
             audio = audio.mean(axis=1)
         
+        if sr != sample_rate:
+            audio = resample(audio, sr, sample_rate)
+            sr = sample_rate
+        
         pcm16 = (audio * 32767).astype("int16").tobytes()
         vad = webrtcvad.Vad(2)  # Aggressiveness level 2
         frame_len = int(sample_rate * frame_ms / 1000) * 2
@@ -193,8 +186,13 @@ def detect_indian_language(text: str) -> Tuple[str, float]:
 
 def translate_text(text: str, target_lang: str, source_lang: Optional[str] = None) -> str:
     """Enhanced translation with Indian language support"""
+    return model_translation(text, target_lang, source_lang)[0]
+
+def model_translation(text: str, target_lang: str, source_lang: Optional[str] = None) -> Tuple[str, bool]:
+    """translate_text's result and whether it came from the model; when
+    False it is a placeholder message or the original text, not a translation"""
     if not text.strip():
-        return ""
+        return "", False
     
     # Map language codes to model names
     model_mapping = {
@@ -212,24 +210,27 @@ def translate_text(text: str, target_lang: str, source_lang: Optional[str] = Non
     model_key = f"{source_lang}-{target_lang}"
     
     if model_key not in model_mapping:
-        return f"Translation not available for {source_lang} to {target_lang}"
+        return f"Translation not available for {source_lang} to {target_lang}", False
     
     translator = load_translator(model_mapping[model_key])
     if translator is None:
-        return f"Translation model not available for {model_key}"
+        return f"Translation model not available for {model_key}", False
     
     try:
         out = translator(text, max_length=512)
-        return out[0]["translation_text"]
+        return out[0]["translation_text"], True
     except Exception as e:
         print(f"Translation error: {e}")
-        return text  # Return original text if translation fails
+        return text, False  # Return original text if translation fails
 
-def analyze_voice_characteristics(wav_path: str, segments: List[Tuple[float, float]]) -> List[Dict]:
-    """Analyze voice characteristics for each segment"""
+def analyze_voice_characteristics(wav_path: str, segments: List[Tuple[float, float]]) -> Tuple[List[SpeakerInfo], SpeakerBatch]:
+    """Analyze voice characteristics for each segment; returns the
+    SpeakerInfo list and the same results as a SpeakerBatch"""
     analyzer = load_voice_analyzer()
-    speaker_infos = analyzer.analyze_speaker_segments(wav_path, segments)
-    
+    return analyzer.analyze_speaker_batch(wav_path, segments)
+
+def speaker_analysis_dicts(speaker_infos: List[SpeakerInfo]) -> List[Dict]:
+    """The packet's speaker_analysis entries"""
     return [
         {
             'speaker_id': info.speaker_id,
@@ -247,38 +248,12 @@ def analyze_voice_characteristics(wav_path: str, segments: List[Tuple[float, flo
         for info in speaker_infos
     ]
 
-def generate_advanced_insights(transcript: str, sentiment: float, speaker_analysis: List[Dict], 
-                             keywords: List[str], metrics: Dict) -> List[Dict]:
+def generate_advanced_insights(transcript: str, sentiment: float, speaker_infos: List[SpeakerInfo], 
+                             keywords: List[str], metrics: Dict,
+                             speaker_batch: Optional[SpeakerBatch] = None) -> List[Dict]:
     """Generate intelligent insights from conversation analysis"""
     generator = load_insights_generator()
-    
-    # Convert speaker analysis to SpeakerInfo objects
-    from .voice_analysis import SpeakerInfo, VoiceCharacteristics
-    speaker_infos = []
-    for sa in speaker_analysis:
-        voice_chars = VoiceCharacteristics(
-            pitch_mean=sa['voice_characteristics']['pitch_mean'],
-            pitch_std=sa['voice_characteristics']['pitch_std'],
-            energy_mean=sa['voice_characteristics']['energy_mean'],
-            energy_std=0.0,  # Not available in simplified version
-            spectral_centroid=0.0,
-            mfcc_features=[],
-            zero_crossing_rate=0.0,
-            speaking_rate=sa['voice_characteristics']['speaking_rate'],
-            voice_type=sa['voice_characteristics']['voice_type'],
-            confidence=sa['confidence']
-        )
-        
-        speaker_info = SpeakerInfo(
-            speaker_id=sa['speaker_id'],
-            voice_characteristics=voice_chars,
-            role=sa['role'],
-            language=sa['language'],
-            confidence=sa['confidence']
-        )
-        speaker_infos.append(speaker_info)
-    
-    return generator.generate_insights(transcript, sentiment, speaker_infos, keywords, metrics)
+    return generator.generate_insights(transcript, sentiment, speaker_infos, keywords, metrics, speaker_batch)
 
 def summarize(text: str) -> str:
     """Enhanced summarization with Indian language support"""
@@ -303,7 +278,8 @@ def keywords(text: str, top_k=8) -> List[str]:
     kw = load_keybert()
     try:
         pairs = kw.extract_keywords(text, keyphrase_ngram_range=(1,2), top_n=top_k, stop_words="english")
-        return list(dict.fromkeys([p[0] for p in pairs]))
+        seen = set()
+        return [p[0] for p in pairs if not (p[0] in seen or seen.add(p[0]))]
     except Exception as e:
         print(f"Keyword extraction error: {e}")
         # Fallback: simple word frequency
@@ -401,7 +377,8 @@ def process_audio_to_packet(wav_path: str, cfg: Dict, lang_hint="auto") -> Dict:
         print(f"Enhanced language detection: {detected_lang} (confidence: {lang_confidence})")
     
     # Voice analysis
-    speaker_analysis = analyze_voice_characteristics(wav_path, segs)
+    speaker_infos, speaker_batch = analyze_voice_characteristics(wav_path, segs)
+    speaker_analysis = speaker_analysis_dicts(speaker_infos)
     print(f"Analyzed {len(speaker_analysis)} speakers")
     
     # NLP processing
@@ -413,7 +390,7 @@ def process_audio_to_packet(wav_path: str, cfg: Dict, lang_hint="auto") -> Dict:
     metrics["sentiment"] = sent
     
     # Generate advanced insights
-    insights = generate_advanced_insights(text, sent, speaker_analysis, kws, metrics)
+    insights = generate_advanced_insights(text, sent, speaker_infos, kws, metrics, speaker_batch)
     print(f"Generated {len(insights)} insights")
     
     # Translation support
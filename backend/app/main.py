@@ -3,26 +3,34 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+from sortedcontainers import SortedList
 import uvicorn
 import json
 import os
 import asyncio
 from datetime import datetime
-import uuid
+import secrets
 import logging
 import base64
 import io
+import functools
+import yaml
 
 # Import our enhanced components
 from app.agents import agent_manager, Priority
 from app.realtime_processor import realtime_processor
 from app.ai_enhanced_pipeline import ai_enhanced_pipeline
 from app.pipeline import process_audio_to_packet as process_audio_file
+from app.pipeline import warmup as warmup_models
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pipeline settings; the model warm-up loads the configured Whisper model
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.yaml"), "r") as _f:
+    CFG = yaml.load(_f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
 app = FastAPI(
     title="Convo Analytics API - Enhanced", 
     version="3.0.0",
@@ -46,6 +54,11 @@ TRAINING_DATA = {
     "language_detections": []
 }
 
+# Listing indexes of (started_at, id), kept sorted on insert so pagination
+# never has to sort DB; one global index plus one per store
+INTERACTION_INDEX = SortedList()
+STORE_INDEX: Dict[str, SortedList] = {}
+
 # Voice configuration
 VOICE_CONFIG = {
     "supported_languages": ["english", "hindi", "tamil", "telugu", "bengali", "gujarati"],
@@ -96,6 +109,16 @@ async def startup_event():
         await ai_enhanced_pipeline.initialize()
         logger.info("AI enhanced pipeline initialized")
         
+        # Pre-load the pipeline models so the first upload doesn't pay for them
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(warmup_models, size=CFG["stt"]["size"], device=CFG["stt"]["device"],
+                                        compute_type=CFG["stt"].get("compute_type", "auto"))
+            )
+            logger.info("Pipeline models warmed up")
+        except Exception as e:
+            logger.warning(f"Model warm-up failed, will load on first use: {e}")
+        
         logger.info("All systems initialized successfully")
         
     except Exception as e:
@@ -172,7 +195,7 @@ async def get_config():
 @app.post("/v1/interactions")
 async def create_interaction(interaction: InteractionCreate):
     """Create a new interaction with enhanced capabilities"""
-    interaction_id = str(uuid.uuid4())
+    interaction_id = secrets.token_hex(16)
     
     # Create interaction object
     interaction_data = {
@@ -199,24 +222,26 @@ async def create_interaction(interaction: InteractionCreate):
     }
     
     DB[interaction_id] = interaction_data
+    index_key = (interaction_data["started_at"], interaction_id)
+    INTERACTION_INDEX.add(index_key)
+    STORE_INDEX.setdefault(interaction.store_id, SortedList()).add(index_key)
     
     return {"id": interaction_id, "status": "created"}
 
 @app.get("/v1/interactions")
 def list_interactions(store_id: Optional[str] = None, limit: int = 50, offset: int = 0):
     """List all interactions with optional filtering"""
-    interactions = list(DB.values())
-    
     # Filter by store_id if provided
     if store_id:
-        interactions = [it for it in interactions if it["store_id"] == store_id]
+        index = STORE_INDEX.get(store_id) or SortedList()
+    else:
+        index = INTERACTION_INDEX
     
-    # Sort by started_at descending (newest first)
-    interactions.sort(key=lambda x: x["started_at"], reverse=True)
-    
-    # Apply pagination
-    total = len(interactions)
-    interactions = interactions[offset:offset + limit]
+    # Indexes are ascending; page from the end for newest first
+    total = len(index)
+    stop = max(0, total - max(0, offset))
+    start = max(0, stop - max(0, limit))
+    interactions = [DB[iid] for _, iid in index.islice(start, stop, reverse=True)]
     
     return {
         "interactions": interactions,
@@ -247,6 +272,7 @@ async def upload_audio(
     if interaction_id not in DB:
         raise HTTPException(status_code=404, detail="Interaction not found")
     
+    temp_path = None
     try:
         # Save uploaded file temporarily
         temp_path = f"/tmp/{interaction_id}_{file.filename}"
@@ -288,15 +314,19 @@ async def upload_audio(
             "processing_time": result.get("processing_time", 0.0)
         })
         
-        # Clean up temp file
-        os.remove(temp_path)
-        
         return result
         
     except Exception as e:
         DB[interaction_id]["processing_status"] = "error"
         logger.error(f"Processing failed: {e}")
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+    finally:
+        # Clean up temp file, also when processing failed
+        if temp_path:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
 
 # Real-time processing endpoints
 @app.post("/v1/realtime/sessions")
@@ -393,7 +423,7 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             return
         
         session = realtime_processor.sessions[session_id]
-        session.websocket = websocket
+        realtime_processor.attach_websocket(session, websocket)
         
         # Keep connection alive and handle messages
         while True:
@@ -427,8 +457,9 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
     except Exception as e:
         logger.error(f"WebSocket connection error: {e}")
     finally:
-        if session_id in realtime_processor.sessions:
-            realtime_processor.sessions[session_id].websocket = None
+        session = realtime_processor.sessions.get(session_id)
+        if session is not None and session.websocket is websocket:
+            realtime_processor.detach_websocket(session)
 
 # Agent management endpoints
 @app.get("/v1/agents/status")
@@ -603,4 +634,5 @@ async def submit_feedback(feedback: Dict[str, Any]):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Single worker: DB, agents and real-time sessions are held in process memory
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools", backlog=2048)
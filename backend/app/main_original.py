@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+from sortedcontainers import SortedList
 import uvicorn
 import json
 import os
@@ -32,6 +33,11 @@ TRAINING_DATA = {
     "language_detections": []
 }
 
+# Listing indexes of (started_at, id), kept sorted on insert so pagination
+# never has to sort DB; one global index plus one per store
+INTERACTION_INDEX = SortedList()
+STORE_INDEX: Dict[str, SortedList] = {}
+
 # Voice configuration
 VOICE_CONFIG = {
     "supported_languages": ["english", "hindi", "tamil", "telugu", "bengali", "gujarati"],
@@ -93,24 +99,26 @@ async def create_interaction(interaction: InteractionCreate):
     }
     
     DB[interaction_id] = interaction_data
+    index_key = (interaction_data["started_at"], interaction_id)
+    INTERACTION_INDEX.add(index_key)
+    STORE_INDEX.setdefault(interaction.store_id, SortedList()).add(index_key)
     
     return {"id": interaction_id, "status": "created"}
 
 @app.get("/v1/interactions")
 def list_interactions(store_id: Optional[str] = None, limit: int = 50, offset: int = 0):
     """List all interactions with optional filtering"""
-    interactions = list(DB.values())
-    
     # Filter by store_id if provided
     if store_id:
-        interactions = [it for it in interactions if it["store_id"] == store_id]
-    
-    # Sort by started_at descending (newest first)
-    interactions.sort(key=lambda x: x["started_at"], reverse=True)
+        index = STORE_INDEX.get(store_id) or SortedList()
+    else:
+        index = INTERACTION_INDEX
     
-    # Apply pagination
-    total = len(interactions)
-    interactions = interactions[offset:offset + limit]
+    # Indexes are ascending; page from the end for newest first
+    total = len(index)
+    stop = max(0, total - max(0, offset))
+    start = max(0, stop - max(0, limit))
+    interactions = [DB[iid] for _, iid in index.islice(start, stop, reverse=True)]
     
     return {
         "interactions": interactions,
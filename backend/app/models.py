@@ -1,8 +1,10 @@
+import threading
+from collections import Counter
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
-@dataclass
+@dataclass(slots=True)
 class VoiceCharacteristics:
     pitch_mean: float
     pitch_std: float
@@ -15,7 +17,7 @@ class VoiceCharacteristics:
     voice_type: str  # "male", "female", "child", "unknown"
     confidence: float
 
-@dataclass
+@dataclass(slots=True)
 class SpeakerInfo:
     speaker_id: str
     voice_characteristics: VoiceCharacteristics
@@ -52,6 +54,7 @@ class Interaction:
     keywords: List[str] = field(default_factory=list)
     metrics: Dict[str, float] = field(default_factory=dict)
     speaker_turns: List[Dict] = field(default_factory=list)
+    segments: List[Tuple[float, float]] = field(default_factory=list)
     translations: Dict[str, str] = field(default_factory=dict)
     # Enhanced fields
     speaker_analysis: List[Dict] = field(default_factory=list)
@@ -61,10 +64,25 @@ class Interaction:
     conversation_quality: float = 0.0
     staff_performance_score: float = 0.0
     customer_satisfaction_score: float = 0.0
+    # Cached (total_conf, staff_conf, staff_n, customer_n, max_conf) over speaker_analysis
+    speaker_stats: Optional[Tuple[float, float, int, int, float]] = field(default=None, repr=False)
 
 # In-memory store for the starter; swap to DB later
 DB: Dict[str, Interaction] = {}
 
+# detected_language -> number of interactions, maintained on create/upload
+LANG_COUNTS: Counter = Counter()
+LANG_COUNTS_LOCK = threading.Lock()
+
+def record_language(new_lang: str, old_lang: Optional[str] = None) -> None:
+    """Move one interaction's count from old_lang (if any) to new_lang"""
+    with LANG_COUNTS_LOCK:
+        if old_lang is not None:
+            LANG_COUNTS[old_lang] -= 1
+            if LANG_COUNTS[old_lang] <= 0:
+                del LANG_COUNTS[old_lang]
+        LANG_COUNTS[new_lang] += 1
+
 # Training data for voice models
 TRAINING_DATA = {
     "voice_samples": [],
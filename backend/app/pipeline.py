@@ -1,151 +1,800 @@
-import os, io, math, tempfile
-from typing import Dict, List, Tuple, Optional
-import signal
+import os, io, math, tempfile, hashlib, threading, functools, json, queue
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Optional, Union
 import time
 import re
-from faster_whisper import WhisperModel
-from transformers import pipeline as hf_pipeline
-from keybert import KeyBERT
-from sentence_transformers import SentenceTransformer
-import webrtcvad
+from concurrent.futures import ThreadPoolExecutor, Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import soundfile as sf
+import numpy as np
 from .pii import redact
+from . import pipeline_common
+from .pipeline_common import BucketClassifier, ENHANCED_BUCKET_WORDS, resample
 
-# Model cache (lazy loading)
-_whisper_model = None
+# Exported INT8 ONNX models (see `make models`); used when present
+MODELS_DIR = os.environ.get("MODELS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models"))
+SUMMARIZER_ONNX_DIR = os.path.join(MODELS_DIR, "bart-large-cnn-int8")
+KEYBERT_ONNX_DIR = os.path.join(MODELS_DIR, "minilm-l12-int8")
+SENTIMENT_ONNX_DIR = os.path.join(MODELS_DIR, "xlmr-sentiment-int8")
+SILERO_VAD_PATH = os.path.join(MODELS_DIR, "silero_vad_int8.onnx")
+TRANSLATOR_CT2_DIR = os.path.join(MODELS_DIR, "opus-mt-en-hi-ct2")
+
+# NLP stages run concurrently in process_audio_to_packet; their ONNX
+# sessions split the cores between them instead of each taking all of them
+NLP_WORKERS = 5
+NLP_THREADS = max(1, (os.cpu_count() or 4) // NLP_WORKERS)
+
+# Heavy ML libraries (faster_whisper, transformers, keybert,
+# sentence_transformers, webrtcvad, librosa) are imported inside the loaders
+# that need them, so importing this module, or using only some stages,
+# doesn't pay for the rest. Set HF_HUB_OFFLINE=1 in production so models
+# resolve from the local cache without network round-trips.
+
+# Batches CTranslate2 runs at once on each Whisper device (its inter_threads)
+WHISPER_NUM_WORKERS = 2
+
+# BART's encoder has 1024 positions; longer inputs are cut in the tokenizer
+SUMMARY_MAX_TOKENS = 1024
+
+# Model cache (lazy loading); Whisper by (size, device, compute_type), each
+# with its batched pipeline (None on faster-whisper < 1.1)
+_whisper_models: Dict[Tuple[str, str, str], Tuple[object, object]] = {}
 _summary_pipe = None
 _sentiment_pipe = None
 _kw_model = None
+_kw_encoder = None  # ONNXSBertEncoder behind _kw_model, when in use
 _translation_pipe = None
+_silero_session = None
+
+# Silero VAD v5 scores 512-sample windows (32 ms at 16 kHz), each prefixed
+# with the last 64 samples of the previous window
+SILERO_WINDOW = 512
+SILERO_CONTEXT = 64
+SILERO_STREAMS = 32
+# Windows of the previous stream each stream is run over before its own
+# (about 0.5 s), so it doesn't start from a cold LSTM state
+SILERO_WARMUP = 16
+
+# Per-transcript NLP results, keyed by (stage, blake2b(text), args)
+NLP_CACHE_SIZE = 1024
+_nlp_cache: "OrderedDict[tuple, object]" = OrderedDict()
+_nlp_cache_lock = threading.Lock()
+
+def _copy_result(result):
+    # Callers may mutate what they get back; never hand out the cached object
+    if isinstance(result, list):
+        return list(result)
+    if isinstance(result, dict):
+        return {k: dict(v) if isinstance(v, dict) else v for k, v in result.items()}
+    return result
+
+class _Uncached:
+    __slots__ = ("value",)
+    
+    def __init__(self, value):
+        self.value = value
+
+def uncached(value):
+    """Wrap a memoized function's fallback result (model missing or
+    failed) so it is returned but not cached; the next call with the same
+    text tries the model again"""
+    return _Uncached(value)
+
+def memoize_text(fn):
+    """LRU-cache fn(text, ...) on a digest of text, so re-processing an
+    identical transcript skips the model calls. Results wrapped in
+    uncached() are passed through without being stored."""
+    stage = f"{fn.__module__}.{fn.__qualname__}"
+    @functools.wraps(fn)
+    def wrapper(text: str, *args, **kwargs):
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        key = (stage, digest, args, tuple(sorted(kwargs.items())))
+        with _nlp_cache_lock:
+            if key in _nlp_cache:
+                _nlp_cache.move_to_end(key)
+                return _copy_result(_nlp_cache[key])
+        
+        result = fn(text, *args, **kwargs)
+        if isinstance(result, _Uncached):
+            return result.value
+        with _nlp_cache_lock:
+            _nlp_cache[key] = result
+            if len(_nlp_cache) > NLP_CACHE_SIZE:
+                _nlp_cache.popitem(last=False)
+        return _copy_result(result)
+    return wrapper
 
-class TimeoutError(Exception):
-    pass
+# Upper bound on one transcription, in seconds
+STT_TIMEOUT = 300
 
-def timeout_handler(signum, frame):
-    raise TimeoutError("Operation timed out")
+def _with_timeout(fn, seconds: float, *args, **kwargs):
+    """Run fn in a worker thread and stop waiting after `seconds`.
+    
+    Unlike SIGALRM this works off the main thread and never interrupts
+    native model code; a timed-out call just finishes in the background.
+    """
+    ex = ThreadPoolExecutor(max_workers=1)
+    try:
+        return ex.submit(fn, *args, **kwargs).result(timeout=seconds)
+    finally:
+        ex.shutdown(wait=False)
+
+def _serialized(fn):
+    """Run a lazy model loader under its own lock, so concurrent first
+    calls (warmup, parallel NLP stages) load the model only once"""
+    lock = threading.Lock()
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with lock:
+            return fn(*args, **kwargs)
+    return wrapper
+
+class BatchingQueue:
+    """Coalesce single-item calls from concurrent requests into batched calls.
+    
+    Items wait up to `window` seconds (or until `max_batch` are queued) and
+    are then handed to fn as one list; fn returns one result per item, in
+    order, which are scattered back to each caller's future.
+    """
+    
+    def __init__(self, fn, max_batch: int = 16, window: float = 0.05):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.window = window
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    def submit(self, item) -> Future:
+        fut = Future()
+        self._queue.put((item, fut))
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name=f"batch-{self.fn.__name__}", daemon=True)
+                    self._worker.start()
+        return fut
+    
+    def submit_sync(self, item, timeout: Optional[float] = None):
+        return self.submit(item).result(timeout)
+    
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            try:
+                results = self.fn([item for item, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            for (_, fut), result in zip(batch, results):
+                fut.set_result(result)
+
+def cuda_device_count() -> int:
+    """GPUs visible to CTranslate2 (0 when it or CUDA is unavailable)"""
+    try:
+        import ctranslate2
+        return ctranslate2.get_cuda_device_count()
+    except Exception:
+        return 0
+
+def load_whisper(size="base", device="auto", compute_type="auto"):
+    return _load_whisper(size, device, compute_type)[0]
 
-def load_whisper(size="base", device="auto"):
-    global _whisper_model
-    if _whisper_model is None:
+@_serialized
+def _load_whisper(size: str, device: str, compute_type: str = "auto"):
+    """(model, batched pipeline) for size, device and compute type (the
+    stt section of config.yaml), loaded on first use"""
+    key = (size, device, compute_type)
+    if key not in _whisper_models:
         try:
             print(f"Loading Whisper model: {size}")
-            compute_type = "int8" if device != "cuda" else "float16"
-            _whisper_model = WhisperModel(size, device="auto", compute_type=compute_type)
+            from faster_whisper import WhisperModel
+            try:
+                from faster_whisper import BatchedInferencePipeline
+            except ImportError:  # faster-whisper < 1.1 has no batched VAD path
+                BatchedInferencePipeline = None
+            n_gpus = cuda_device_count() if device in ("auto", "cuda") else 0
+            on_gpu = n_gpus > 0
+            if compute_type == "auto":
+                # CTranslate2 INT8 weights; keep activations in FP16 on GPU
+                compute_type = "int8_float16" if on_gpu else "int8"
+            # One model per configuration, reused across requests; CT2 keeps
+            # its decoder KV caches in place. Flash attention is GPU-only in CT2.
+            model_kwargs = {"flash_attention": True, "device_index": list(range(n_gpus))} if on_gpu else {}
+            model = WhisperModel(
+                size,
+                device="cuda" if on_gpu else "cpu",
+                compute_type=compute_type,
+                cpu_threads=os.cpu_count() or 4,
+                num_workers=WHISPER_NUM_WORKERS,
+                **model_kwargs,
+            )
+            batched = BatchedInferencePipeline(model=model) if BatchedInferencePipeline is not None else None
+            _whisper_models[key] = (model, batched)
             print("Whisper model loaded successfully")
         except Exception as e:
             print(f"Error loading Whisper: {e}")
             raise
-    return _whisper_model
+    return _whisper_models[key]
+
+def _ort_session_options(threads: Optional[int] = None):
+    import onnxruntime as ort
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = threads or os.cpu_count() or 4
+    return opts
+
+def _load_onnx_summarizer():
+    """INT8 ONNX Runtime BART behind the same transformers pipeline interface"""
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    from transformers import AutoTokenizer, pipeline as hf_pipeline
+    model = ORTModelForSeq2SeqLM.from_pretrained(
+        SUMMARIZER_ONNX_DIR,
+        encoder_file_name="encoder_model_quantized.onnx",
+        decoder_file_name="decoder_model_quantized.onnx",
+        decoder_with_past_file_name="decoder_with_past_model_quantized.onnx",
+        provider="CPUExecutionProvider",
+        session_options=_ort_session_options(NLP_THREADS),
+    )
+    tokenizer = AutoTokenizer.from_pretrained(SUMMARIZER_ONNX_DIR)
+    return hf_pipeline("summarization", model=model, tokenizer=tokenizer)
 
+@_serialized
 def load_summarizer():
     global _summary_pipe
     if _summary_pipe is None:
         try:
             print("Loading summarization model...")
-            _summary_pipe = hf_pipeline("summarization", model="facebook/bart-large-cnn")
+            if os.path.isdir(SUMMARIZER_ONNX_DIR):
+                try:
+                    _summary_pipe = _load_onnx_summarizer()
+                except Exception as e:
+                    print(f"ONNX summarizer unavailable, using PyTorch: {e}")
+            if _summary_pipe is None:
+                from transformers import pipeline as hf_pipeline
+                _summary_pipe = hf_pipeline("summarization", model="facebook/bart-large-cnn")
+            _summary_pipe.tokenizer.model_max_length = SUMMARY_MAX_TOKENS
             print("Summarization model loaded successfully")
         except Exception as e:
             print(f"Error loading summarizer: {e}")
             _summary_pipe = None
     return _summary_pipe
 
+class _FastTokenizer:
+    """The part of the transformers tokenizer API sentiment chunking uses,
+    over a Rust tokenizers.Tokenizer"""
+    
+    def __init__(self, tokenizer):
+        self._tokenizer = tokenizer
+    
+    @classmethod
+    def from_file(cls, path: str) -> "_FastTokenizer":
+        # Chunking must see every token of the transcript, so never apply
+        # the model's truncation (or padding) from tokenizer.json here
+        from tokenizers import Tokenizer
+        tokenizer = Tokenizer.from_file(path)
+        tokenizer.no_truncation()
+        tokenizer.no_padding()
+        return cls(tokenizer)
+    
+    def __call__(self, text: str, add_special_tokens: bool = True) -> Dict[str, List[int]]:
+        return {"input_ids": self._tokenizer.encode(text, add_special_tokens=add_special_tokens).ids}
+    
+    def decode(self, ids: List[int]) -> str:
+        return self._tokenizer.decode(ids)
+
+class ONNXSentimentClassifier:
+    """INT8 ONNX XLM-R sentiment model called like a transformers
+    text-classification pipeline with top_k=None, without loading torch.
+    
+    Batches are padded to their longest member only, and softmax is done
+    in NumPy.
+    """
+    
+    def __init__(self, model_dir: str, max_length: int = 512):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        opts = _ort_session_options(NLP_THREADS)
+        opts.inter_op_num_threads = NLP_THREADS
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model_quantized.onnx"),
+            sess_options=opts,
+            providers=["CPUExecutionProvider"],
+        )
+        tokenizer_path = os.path.join(model_dir, "tokenizer.json")
+        tokenizer = Tokenizer.from_file(tokenizer_path)
+        # Only the model's own encode is cut to max_length; sentiment
+        # chunking splits long transcripts with an untruncated copy
+        tokenizer.enable_truncation(max_length)
+        tokenizer.enable_padding(pad_id=tokenizer.token_to_id("<pad>") or 1, pad_token="<pad>")
+        self._tokenizer = tokenizer
+        self.tokenizer = _FastTokenizer.from_file(tokenizer_path)
+        with open(os.path.join(model_dir, "config.json")) as f:
+            id2label = json.load(f)["id2label"]
+        self.labels = [id2label[str(i)] for i in range(len(id2label))]
+    
+    def __call__(self, texts, batch_size: int = 16, truncation: bool = True) -> List[List[Dict]]:
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+        
+        results = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self._tokenizer.encode_batch(texts[start:start + batch_size])
+            logits = self.session.run(None, {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            })[0]
+            probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probs /= probs.sum(axis=1, keepdims=True)
+            results.extend(
+                [{"label": label, "score": float(p)} for label, p in zip(self.labels, row)]
+                for row in probs
+            )
+        
+        return results[:1] if single else results
+
+@_serialized
 def load_sentiment():
     global _sentiment_pipe
     if _sentiment_pipe is None:
         try:
             print("Loading sentiment model...")
-            _sentiment_pipe = hf_pipeline(
-                "text-classification", 
-                model="cardiffnlp/twitter-xlm-roberta-base-sentiment",
-                top_k=None
-            )
+            if os.path.isdir(SENTIMENT_ONNX_DIR):
+                try:
+                    _sentiment_pipe = ONNXSentimentClassifier(SENTIMENT_ONNX_DIR)
+                except Exception as e:
+                    print(f"ONNX sentiment model unavailable, using PyTorch: {e}")
+            if _sentiment_pipe is None:
+                from transformers import pipeline as hf_pipeline
+                _sentiment_pipe = hf_pipeline(
+                    "text-classification", 
+                    model="cardiffnlp/twitter-xlm-roberta-base-sentiment",
+                    top_k=None
+                )
             print("Sentiment model loaded successfully")
         except Exception as e:
             print(f"Error loading sentiment: {e}")
             _sentiment_pipe = None
     return _sentiment_pipe
 
+class ONNXSBertEncoder:
+    """Mean-pooled sentence embeddings from an INT8 ONNX MiniLM export.
+    
+    Inputs are sorted by token length and each batch is padded only to its
+    own longest member (SBERT-style smart batching), then returned in the
+    caller's order.
+    """
+    
+    def __init__(self, model_dir: str, max_length: int = 128):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model_quantized.onnx"),
+            sess_options=_ort_session_options(NLP_THREADS),
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(max_length)
+        self.pad_id = self.tokenizer.token_to_id("<pad>") or 0
+    
+    def encode(self, sentences: List[str], batch_size: int = 32) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(list(sentences))
+        lengths = np.array([len(e.ids) for e in encodings])
+        order = np.argsort(lengths, kind="stable")
+        out = None
+        
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            width = int(lengths[idx].max())
+            input_ids = np.full((len(idx), width), self.pad_id, dtype=np.int64)
+            attention_mask = np.zeros((len(idx), width), dtype=np.int64)
+            for row, i in enumerate(idx):
+                n = lengths[i]
+                input_ids[row, :n] = encodings[i].ids
+                attention_mask[row, :n] = 1
+            
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+            hidden = self.session.run(None, feeds)[0]
+            
+            mask = attention_mask[..., None].astype(np.float32)
+            emb = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            if out is None:
+                out = np.empty((len(encodings), emb.shape[1]), dtype=np.float32)
+            out[idx] = emb
+        
+        return out if out is not None else np.empty((0, 0), dtype=np.float32)
+    
+    def embed(self, documents: List[str], verbose: bool = False) -> np.ndarray:
+        return self.encode(documents)
+
+def _keybert_backend(encoder):
+    """Wrap an encoder with .embed() as a KeyBERT backend (imported lazily)"""
+    from keybert.backend import BaseEmbedder
+    
+    class EncoderBackend(BaseEmbedder):
+        def embed(self, documents, verbose=False):
+            return encoder.embed(documents, verbose)
+    
+    return EncoderBackend()
+
+@_serialized
 def load_keybert():
-    global _kw_model
+    global _kw_model, _kw_encoder
     if _kw_model is None:
         try:
             print("Loading KeyBERT model...")
-            _kw_model = KeyBERT(SentenceTransformer("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"))
+            from keybert import KeyBERT
+            if os.path.isdir(KEYBERT_ONNX_DIR):
+                try:
+                    _kw_encoder = ONNXSBertEncoder(KEYBERT_ONNX_DIR)
+                    _kw_model = KeyBERT(_keybert_backend(_kw_encoder))
+                except Exception as e:
+                    print(f"ONNX encoder unavailable, using SentenceTransformer: {e}")
+            if _kw_model is None:
+                from sentence_transformers import SentenceTransformer
+                _kw_model = KeyBERT(SentenceTransformer("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"))
             print("KeyBERT model loaded successfully")
         except Exception as e:
             print(f"Error loading KeyBERT: {e}")
             _kw_model = None
     return _kw_model
 
+class CT2Translator:
+    """INT8 CTranslate2 conversion of a Marian model, called like a
+    transformers translation pipeline"""
+    
+    def __init__(self, model_dir: str):
+        import ctranslate2
+        import sentencepiece as spm
+        self.translator = ctranslate2.Translator(
+            model_dir, device="cpu", compute_type="int8", intra_threads=NLP_THREADS
+        )
+        self.source_sp = spm.SentencePieceProcessor(model_file=os.path.join(model_dir, "source.spm"))
+        self.target_sp = spm.SentencePieceProcessor(model_file=os.path.join(model_dir, "target.spm"))
+    
+    def __call__(self, texts, max_decoding_length: int = 256) -> List[Dict[str, str]]:
+        if isinstance(texts, str):
+            texts = [texts]
+        batch = [self.source_sp.encode(t, out_type=str) + ["</s>"] for t in texts]
+        results = self.translator.translate_batch(batch, beam_size=1, max_decoding_length=max_decoding_length)
+        return [{"translation_text": self.target_sp.decode(r.hypotheses[0])} for r in results]
+
+@_serialized
 def load_translator():
     global _translation_pipe
     if _translation_pipe is None:
         try:
             print("Loading translation model...")
-            _translation_pipe = hf_pipeline("translation", model="Helsinki-NLP/opus-mt-en-hi")
+            if os.path.isdir(TRANSLATOR_CT2_DIR):
+                try:
+                    _translation_pipe = CT2Translator(TRANSLATOR_CT2_DIR)
+                except Exception as e:
+                    print(f"CTranslate2 translator unavailable, using PyTorch: {e}")
+            if _translation_pipe is None:
+                from transformers import pipeline as hf_pipeline
+                _translation_pipe = hf_pipeline("translation", model="Helsinki-NLP/opus-mt-en-hi")
             print("Translation model loaded successfully")
         except Exception as e:
             print(f"Error loading translator: {e}")
             _translation_pipe = None
     return _translation_pipe
 
-def webrtc_vad_segments(wav_path: str, sample_rate=16000, frame_ms=30) -> List[Tuple[float,float]]:
-    try:
-        audio, sr = sf.read(wav_path)
-        if sr != sample_rate:
-            import librosa
-            audio = librosa.resample(audio, orig_sr=sr, target_sr=sample_rate)
-            sr = sample_rate
-        
+@_serialized
+def load_silero_vad():
+    global _silero_session
+    if _silero_session is None and os.path.isfile(SILERO_VAD_PATH):
+        try:
+            import onnxruntime as ort
+            _silero_session = ort.InferenceSession(
+                SILERO_VAD_PATH,
+                sess_options=_ort_session_options(),
+                providers=["CPUExecutionProvider"],
+            )
+            print("Silero VAD loaded successfully")
+        except Exception as e:
+            print(f"Error loading Silero VAD: {e}")
+    return _silero_session
+
+def warmup(size: str = "base", device: str = "auto", compute_type: str = "auto") -> None:
+    """Load every model concurrently, so the first request doesn't pay
+    the cold start one model at a time; Whisper is loaded with the size,
+    device and compute type the requests will ask for (the stt section of
+    config.yaml)"""
+    loaders = {
+        "load_whisper": functools.partial(load_whisper, size=size, device=device, compute_type=compute_type),
+        **{fn.__name__: fn for fn in (load_summarizer, load_sentiment, load_keybert, load_translator, load_silero_vad)},
+    }
+    with ThreadPoolExecutor(max_workers=len(loaders)) as ex:
+        futures = [(name, ex.submit(fn)) for name, fn in loaders.items()]
+    for name, fut in futures:
+        if fut.exception() is not None:
+            print(f"Warm-up of {name} failed, will load on first use: {fut.exception()}")
+
+def _silero_speech_flags(session, audio: np.ndarray, sample_rate: int, threshold: float = 0.5) -> np.ndarray:
+    """Speech flag per Silero window.
+    
+    The signal is cut into up to SILERO_STREAMS contiguous streams that are
+    stepped together, so each session.run scores one window of every stream
+    while the recurrent state stays per stream. Every stream but the first
+    is first run over the last SILERO_WARMUP windows of the stream before it,
+    and those outputs are dropped, so its LSTM state and context are warm
+    where its own windows start rather than reset mid-speech; the first
+    stream starts cold, as a single sequential pass would.
+    """
+    n_windows = len(audio) // SILERO_WINDOW
+    if n_windows == 0:
+        return np.zeros(0, dtype=bool)
+    
+    streams = min(SILERO_STREAMS, n_windows)
+    steps = -(-n_windows // streams)
+    warm = min(SILERO_WARMUP, steps) if streams > 1 else 0
+    # `warm` zero windows ahead of the signal feed the first stream's warm-up
+    padded = np.zeros((warm + streams * steps) * SILERO_WINDOW, dtype=np.float32)
+    padded[warm * SILERO_WINDOW:(warm + n_windows) * SILERO_WINDOW] = audio[:n_windows * SILERO_WINDOW]
+    framed = padded.reshape(-1, SILERO_WINDOW)
+    # Stream s reads windows [s*steps - warm, (s+1)*steps) of the signal
+    rows = np.arange(streams)[:, None] * steps + np.arange(warm + steps)[None, :]
+    windows = framed[rows]
+    
+    state = np.zeros((2, streams, 128), dtype=np.float32)
+    context = np.zeros((streams, SILERO_CONTEXT), dtype=np.float32)
+    sr = np.array(sample_rate, dtype=np.int64)
+    probs = np.empty((streams, steps), dtype=np.float32)
+    for t in range(warm + steps):
+        if t == warm:
+            # The first stream's warm-up was padding, so start it cold
+            state[:, 0] = 0.0
+            context[0] = 0.0
+        chunk = windows[:, t]
+        out, state = session.run(None, {
+            "input": np.concatenate((context, chunk), axis=1),
+            "state": state,
+            "sr": sr,
+        })
+        if t >= warm:
+            probs[:, t - warm] = out[:, 0]
+        context = chunk[:, -SILERO_CONTEXT:]
+    
+    return probs.reshape(-1)[:n_windows] >= threshold
+
+def _webrtc_speech_flags(audio_i16: np.ndarray, sample_rate: int, frame_ms: int) -> np.ndarray:
+    # Whole frames only, as an (n_frames, samples_per_frame) int16 view
+    samples_per_frame = int(sample_rate * frame_ms / 1000)
+    n_frames = len(audio_i16) // samples_per_frame
+    frames = audio_i16[:n_frames * samples_per_frame].reshape(n_frames, samples_per_frame)
+    
+    import webrtcvad
+    vad = webrtcvad.Vad(2)
+    return np.fromiter((vad.is_speech(f.tobytes(), sample_rate) for f in frames), dtype=bool, count=n_frames)
+
+def _speech_runs(speech: np.ndarray, frame_ms: float) -> List[Tuple[float,float]]:
+    # Run edges: +1 where speech starts, -1 one past where it ends
+    edges = np.diff(np.concatenate(([0], speech.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return []
+    
+    # merge short gaps (< 200ms)
+    keep = (starts[1:] - ends[:-1]) * frame_ms >= 200
+    starts = starts[np.concatenate(([True], keep))]
+    ends = ends[np.concatenate((keep, [True]))]
+    
+    step = frame_ms / 1000.0
+    return [(float(s * step), float(e * step)) for s, e in zip(starts, ends)]
+
+def read_audio(wav_path: str, sample_rate: int = 16000, dtype: str = "float32") -> np.ndarray:
+    """Mono audio at sample_rate as float32 or int16.
+    
+    When no resampling is needed, int16 comes straight out of libsndfile
+    instead of a float round-trip.
+    """
+    if dtype == "int16" and sf.info(wav_path).samplerate == sample_rate:
+        audio, _ = sf.read(wav_path, dtype="int16")
         if audio.ndim > 1:
-            audio = audio.mean(axis=1)
-        
-        pcm16 = (audio * 32767).astype("int16").tobytes()
-        vad = webrtcvad.Vad(2)
-        frame_len = int(sample_rate * frame_ms / 1000) * 2
-        frames = [pcm16[i:i+frame_len] for i in range(0, len(pcm16), frame_len)]
-        
-        speech = []
-        segs = []
-        cur_start = None
-        t = 0.0
-        step = frame_ms / 1000.0
-        
-        for f in frames:
-            is_speech = vad.is_speech(f, sample_rate)
-            if is_speech and cur_start is None:
-                cur_start = t
-            if not is_speech and cur_start is not None:
-                segs.append((cur_start, t))
-                cur_start = None
-            t += step
-        
-        if cur_start is not None:
-            segs.append((cur_start, t))
-        
-        # merge short gaps
-        merged = []
-        for s,e in segs:
-            if merged and s - merged[-1][1] < 0.2:  # 200ms gap
-                merged[-1] = (merged[-1][0], e)
-            else:
-                merged.append((s,e))
-        
-        return merged
+            audio = audio.mean(axis=1).astype(np.int16)
+        return audio
+    
+    audio, sr = sf.read(wav_path, dtype="float32")
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if sr != sample_rate:
+        audio = resample(audio, sr, sample_rate)
+    if dtype == "int16":
+        audio = np.clip(audio * 32768, -32768, 32767).astype(np.int16)
+    return audio
+
+def vad_segments(wav_path: Union[str, np.ndarray], sample_rate=16000, frame_ms=30) -> List[Tuple[float,float]]:
+    """Speech segments via Silero VAD when its ONNX model is present, else webrtcvad.
+    
+    Takes a file, or an already decoded mono signal (float32 or int16) at
+    sample_rate. Raises on unreadable audio; webrtc_vad_segments is the
+    forgiving wrapper.
+    """
+    if isinstance(wav_path, np.ndarray):
+        return _segments_from_audio(wav_path, sample_rate, frame_ms)
+    silero = sample_rate == 16000 and load_silero_vad() is not None
+    audio = read_audio(wav_path, sample_rate, dtype="float32" if silero else "int16")
+    return _segments_from_audio(audio, sample_rate, frame_ms)
+
+def vad_segments_with_audio(wav_path: str, sample_rate=16000, frame_ms=30) -> Tuple[List[Tuple[float,float]], np.ndarray]:
+    """Like vad_segments, but also returns the decoded mono float32 signal
+    so it can be handed straight to Whisper instead of decoding the file again"""
+    audio = read_audio(wav_path, sample_rate)
+    return _segments_from_audio(audio, sample_rate, frame_ms), audio
+
+def _segments_from_audio(audio: np.ndarray, sample_rate: int, frame_ms: int) -> List[Tuple[float,float]]:
+    session = load_silero_vad() if sample_rate == 16000 else None
+    if session is not None:
+        if audio.dtype == np.int16:
+            audio = audio.astype(np.float32) / 32768
+        speech = _silero_speech_flags(session, audio, sample_rate)
+        return _speech_runs(speech, SILERO_WINDOW * 1000 / sample_rate)
+    
+    if audio.dtype != np.int16:
+        audio = np.clip(audio * 32768, -32768, 32767).astype(np.int16)
+    return _speech_runs(_webrtc_speech_flags(audio, sample_rate, frame_ms), frame_ms)
+
+def webrtc_vad_segments(wav_path: Union[str, np.ndarray], sample_rate=16000, frame_ms=30) -> List[Tuple[float,float]]:
+    try:
+        return vad_segments(wav_path, sample_rate, frame_ms)
     except Exception as e:
         print(f"VAD error: {e}")
         return [(0.0, 2.0)]  # fallback
 
-def transcribe_whisper(wav_path: str, size="base", device="auto", lang_hint="auto") -> str:
+def _batched_clips(segs: List[Tuple[float,float]], sample_rate: int = 16000,
+                   max_len: float = 30.0) -> List[Dict[str, int]]:
+    # The batched pipeline slices audio[start:end], so clips are sample
+    # indices, and decodes each clip as one Whisper window (<= 30 s)
+    max_samples = int(max_len * sample_rate)
+    clips = []
+    for s, e in segs:
+        start, end = int(s * sample_rate), int(e * sample_rate)
+        while end - start > max_samples:
+            clips.append({"start": start, "end": start + max_samples})
+            start += max_samples
+        if end > start:
+            clips.append({"start": start, "end": end})
+    return clips
+
+def transcribe_whisper(wav_path: Union[str, np.ndarray], size="base", device="auto", lang_hint="auto", compute_type="auto",
+                       speech_segments: Optional[List[Tuple[float,float]]] = None) -> str:
+    """Transcribe a file, or an already decoded 16 kHz mono float32 signal.
+    
+    With speech_segments, only those spans are decoded and Whisper's own VAD
+    pass is skipped.
+    """
     try:
-        model = load_whisper(size=size, device=device)
-        segments, info = model.transcribe(wav_path, beam_size=1, language=None if lang_hint=="auto" else lang_hint)
-        text = " ".join([s.text.strip() for s in segments])
-        return text.strip()
+        model, batched = _load_whisper(size, device, compute_type)
+        return _with_timeout(_transcribe, STT_TIMEOUT, model, batched, wav_path, lang_hint, speech_segments)
+    except FutureTimeoutError:
+        print(f"Transcription timed out after {STT_TIMEOUT}s")
+        return "Error in transcription: timed out"
     except Exception as e:
         print(f"Transcription error: {e}")
         return f"Error in transcription: {str(e)}"
 
+def _transcribe(model, batched, wav_path: Union[str, np.ndarray], lang_hint: str,
+                speech_segments: Optional[List[Tuple[float,float]]]) -> str:
+    language = None if lang_hint == "auto" else lang_hint
+    use_vad = not speech_segments
+    vad_parameters = {"min_silence_duration_ms": 500} if use_vad else None
+    if batched is not None:
+        # Decode the VAD-detected speech chunks in parallel batches
+        segments, info = batched.transcribe(
+            wav_path,
+            beam_size=1,
+            language=language,
+            vad_filter=use_vad,
+            vad_parameters=vad_parameters,
+            clip_timestamps=None if use_vad else _batched_clips(speech_segments),
+            batch_size=max(8, 2 * (os.cpu_count() or 4)),
+        )
+    else:
+        segments, info = model.transcribe(
+            wav_path,
+            beam_size=1,
+            language=language,
+            vad_filter=use_vad,
+            vad_parameters=vad_parameters,
+            clip_timestamps="0" if use_vad else [t for seg in speech_segments for t in seg],
+        )
+    text = " ".join([s.text.strip() for s in segments])
+    return text.strip()
+
+def _generate_batch(clips: List[Union[str, np.ndarray]], lang_hints: List[str],
+                    prompts: Optional[List[str]], timestamps: bool, size: str, device: str):
+    """One batched encoder + greedy generate call over short clips
+    (each <= 30 s); returns each clip's tokenizer and token ids"""
+    from faster_whisper.audio import decode_audio, pad_or_trim
+    from faster_whisper.tokenizer import Tokenizer
+
+    model = load_whisper(size=size, device=device)
+    audios = [decode_audio(c, sampling_rate=16000) if isinstance(c, str) else c for c in clips]
+    # Whisper's encoder takes fixed 30 s windows (3000 mel frames)
+    features = np.stack([pad_or_trim(model.feature_extractor(a)) for a in audios])
+    encoder_output = model.encode(features)
+
+    languages = [None if hint == "auto" else hint for hint in lang_hints]
+    if not model.model.is_multilingual:
+        languages = ["en"] * len(languages)
+    elif None in languages:
+        detected = model.model.detect_language(encoder_output)
+        languages = [lang or probs[0][0][2:-2] for lang, probs in zip(languages, detected)]
+
+    tokenizers = {
+        lang: Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language=lang)
+        for lang in set(languages)
+    }
+    sequences = []
+    for n, lang in enumerate(languages):
+        tokenizer = tokenizers[lang]
+        sequence = []
+        if prompts and prompts[n]:
+            # Previous text as context, as faster-whisper does for initial_prompt
+            prompt_tokens = tokenizer.encode(" " + prompts[n].strip())
+            sequence = [tokenizer.sot_prev] + prompt_tokens[-(model.max_length // 2 - 1):]
+        sequence += tokenizer.sot_sequence
+        if not timestamps:
+            sequence.append(tokenizer.no_timestamps)
+        sequences.append(sequence)
+    results = model.model.generate(
+        encoder_output,
+        sequences,
+        beam_size=1,
+        max_length=model.max_length,
+        suppress_blank=True,
+        suppress_tokens=[-1],
+    )
+    return [(tokenizers[lang], r.sequences_ids[0]) for lang, r in zip(languages, results)]
+
+def transcribe_batch_segments(clips: List[Union[str, np.ndarray]], lang_hints: List[str],
+                              size="base", device="auto",
+                              prompts: Optional[List[str]] = None) -> List[List[Tuple[float, Optional[float], str]]]:
+    """Transcribe several short clips (each <= 30 s) in one Whisper pass and
+    return each clip's (start, end, text) segments, in seconds from the
+    start of the clip. A trailing segment the model didn't close has end None.
+    
+    The clips' log-mel features are stacked into one batch, so a single
+    encoder call and a single greedy generate call serve all of them; each
+    clip keeps its own language prompt, and optionally its own previous-text
+    prompt. Clips are files or decoded 16 kHz mono float32 signals.
+    """
+    if not clips:
+        return []
+    out = []
+    for tokenizer, tokens in _generate_batch(clips, lang_hints, prompts, True, size, device):
+        segments, text_tokens, last = [], [], 0.0
+        for t in tokens:
+            if t >= tokenizer.timestamp_begin:
+                ts = (t - tokenizer.timestamp_begin) * 0.02
+                if text_tokens:
+                    segments.append((last, ts, tokenizer.decode(text_tokens).strip()))
+                    text_tokens = []
+                last = ts
+            elif t < tokenizer.eot:
+                text_tokens.append(t)
+        if text_tokens:
+            segments.append((last, None, tokenizer.decode(text_tokens).strip()))
+        out.append([seg for seg in segments if seg[2]])
+    return out
+
+@memoize_text
 def translate_text(text: str, target_lang: str = "hi") -> str:
     try:
         if not text.strip():
@@ -153,7 +802,7 @@ def translate_text(text: str, target_lang: str = "hi") -> str:
         
         translator = load_translator()
         if translator is None:
-            return text  # fallback to original
+            return uncached(text)  # fallback to original
         
         # Simple language detection
         if target_lang == "hi" and re.search(r'[\u0900-\u097F]', text):
@@ -163,8 +812,16 @@ def translate_text(text: str, target_lang: str = "hi") -> str:
         return result[0]["translation_text"]
     except Exception as e:
         print(f"Translation error: {e}")
-        return text  # fallback to original
+        return uncached(text)  # fallback to original
+
+def _summarize_batch(texts: List[str]) -> List[Dict[str, str]]:
+    return _summary_pipe(texts, max_length=128, min_length=40, do_sample=False, num_beams=1,
+                         truncation=True, batch_size=len(texts))
 
+# Summaries and sentiment chunks from concurrent uploads share model calls
+_summary_batcher = BatchingQueue(_summarize_batch)
+
+@memoize_text
 def summarize(text: str) -> str:
     try:
         if not text.strip():
@@ -177,14 +834,36 @@ def summarize(text: str) -> str:
             if not sents:
                 return ""
             pick = sents[:1] + sents[-1:]
-            return ". ".join(pick)[:500]
+            summary = ". ".join(pick)[:500]
+            return summary if sp is not None else uncached(summary)
         
-        out = sp(text[:3000], max_length=128, min_length=40, do_sample=False)
-        return out[0]["summary_text"]
+        return _summary_batcher.submit_sync(text[:3000])["summary_text"]
     except Exception as e:
         print(f"Summarization error: {e}")
-        return text[:200] + "..." if len(text) > 200 else text
+        return uncached(text[:200] + "..." if len(text) > 200 else text)
+
+def _unit_fp16(emb: np.ndarray) -> np.ndarray:
+    # Normalize in float32, then keep only the half-precision copy
+    return (emb / np.maximum(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12)).astype(np.float16)
+
+def _rank_keyphrases(encoder: "ONNXSBertEncoder", text: str, top_k: int) -> List[str]:
+    """KeyBERT's default ranking (1-2 gram candidates by cosine similarity
+    to the document), with the similarity done on float16 unit vectors"""
+    from sklearn.feature_extraction.text import CountVectorizer
+    candidates = CountVectorizer(ngram_range=(1,2), stop_words="english").fit([text]).get_feature_names_out()
+    if len(candidates) == 0:
+        return []
+    
+    doc = _unit_fp16(encoder.encode([text]))[0]
+    cands = _unit_fp16(encoder.encode(list(candidates)))
+    scores = (cands @ doc).astype(np.float32)
+    
+    k = min(top_k, len(candidates))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [str(candidates[i]) for i in top]
 
+@memoize_text
 def keywords(text: str, top_k=8) -> List[str]:
     try:
         if not text.strip():
@@ -195,14 +874,54 @@ def keywords(text: str, top_k=8) -> List[str]:
             # fallback: simple keyword extraction
             words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
             from collections import Counter
-            return [word for word, count in Counter(words).most_common(top_k)]
+            return uncached([word for word, count in Counter(words).most_common(top_k)])
+        
+        if _kw_encoder is not None:
+            return _rank_keyphrases(_kw_encoder, text, top_k)
         
         pairs = kw.extract_keywords(text, keyphrase_ngram_range=(1,2), top_n=top_k, stop_words="english")
-        return list(dict.fromkeys([p[0] for p in pairs]))
+        seen = set()
+        return [p[0] for p in pairs if not (p[0] in seen or seen.add(p[0]))]
     except Exception as e:
         print(f"Keyword extraction error: {e}")
-        return []
+        return uncached([])
+
+# Sentiment covers the whole transcript in overlapping token windows
+SENTIMENT_CHUNK_TOKENS = 254  # plus <s> and </s>
+SENTIMENT_OVERLAP = 32
+_SENTIMENT_LABELS = ("negative", "neutral", "positive")
+_SENTIMENT_WEIGHTS = np.array([-1.0, 0.0, 1.0])
+
+def _sentiment_chunks(tokenizer, text: str) -> Tuple[List[str], List[int]]:
+    """Split text into overlapping token windows, shortest first so the
+    pipeline's per-batch padding stays small; returns (texts, token counts)"""
+    ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+    step = SENTIMENT_CHUNK_TOKENS - SENTIMENT_OVERLAP
+    windows = [ids[i:i + SENTIMENT_CHUNK_TOKENS] for i in range(0, max(1, len(ids) - SENTIMENT_OVERLAP), step)]
+    windows = [w for w in windows if w] or [ids]
+    windows.sort(key=len)
+    return [tokenizer.decode(w) for w in windows], [max(1, len(w)) for w in windows]
+
+def _sentiment_batch(requests: List[Tuple[List[str], List[int]]]) -> List[list]:
+    # Score every request's chunks in one call, shortest first so padding
+    # stays small, then split the scores back per request
+    chunks = [c for cs, _ in requests for c in cs]
+    lengths = [n for _, ns in requests for n in ns]
+    order = sorted(range(len(chunks)), key=lengths.__getitem__)
+    scored = _sentiment_pipe([chunks[i] for i in order], batch_size=16, truncation=True)
+    scores = [None] * len(chunks)
+    for i, s in zip(order, scored):
+        scores[i] = s
+    
+    out, start = [], 0
+    for cs, _ in requests:
+        out.append(scores[start:start + len(cs)])
+        start += len(cs)
+    return out
 
+_sentiment_batcher = BatchingQueue(_sentiment_batch)
+
+@memoize_text
 def sentiment_score(text: str) -> float:
     try:
         if not text.strip():
@@ -210,14 +929,33 @@ def sentiment_score(text: str) -> float:
         
         sp = load_sentiment()
         if sp is None:
-            return 0.0
+            return uncached(0.0)
         
-        scores = sp(text[:1000])[0]
-        mapping = {"negative": -1.0, "neutral": 0.0, "positive": 1.0}
-        return sum(mapping.get(s["label"].lower(),0) * s["score"] for s in scores)
+        chunks, lengths = _sentiment_chunks(sp.tokenizer, text)
+        batched_scores = _sentiment_batcher.submit_sync((chunks, lengths))
+        # (n_chunks, 3) probabilities in _SENTIMENT_LABELS order
+        probs = np.array([
+            [by_label.get(label, 0.0) for label in _SENTIMENT_LABELS]
+            for by_label in ({s["label"].lower(): s["score"] for s in scores} for scores in batched_scores)
+        ], dtype=np.float64)
+        return float(np.average(probs @ _SENTIMENT_WEIGHTS, weights=lengths))
     except Exception as e:
         print(f"Sentiment analysis error: {e}")
-        return 0.0
+        return uncached(0.0)
+
+_CUSTOMER_INDICATORS = [
+    'i want', 'i need', 'my order', 'refund', 'return', 'problem', 'issue',
+    'complaint', 'dissatisfied', 'wrong', 'damaged', 'missing'
+]
+
+_STAFF_INDICATORS = [
+    'i understand', 'let me help', 'i can help', 'we can', 'our policy',
+    'i apologize', 'thank you', 'is there anything else'
+]
+
+# Case-insensitive alternations, so lines needn't be lowercased
+_CUSTOMER_RE = re.compile("|".join(map(re.escape, _CUSTOMER_INDICATORS)), re.IGNORECASE)
+_STAFF_RE = re.compile("|".join(map(re.escape, _STAFF_INDICATORS)), re.IGNORECASE)
 
 def analyze_conversation_flow(text: str) -> Dict[str, any]:
     """Analyze conversation flow and identify speakers"""
@@ -225,24 +963,13 @@ def analyze_conversation_flow(text: str) -> Dict[str, any]:
         # Simple speaker identification based on patterns
         lines = [line.strip() for line in text.split('\n') if line.strip()]
         
-        customer_indicators = [
-            'i want', 'i need', 'my order', 'refund', 'return', 'problem', 'issue',
-            'complaint', 'dissatisfied', 'wrong', 'damaged', 'missing'
-        ]
-        
-        staff_indicators = [
-            'i understand', 'let me help', 'i can help', 'we can', 'our policy',
-            'i apologize', 'thank you', 'is there anything else'
-        ]
-        
         customer_lines = 0
         staff_lines = 0
         
         for line in lines:
-            line_lower = line.lower()
-            if any(indicator in line_lower for indicator in customer_indicators):
+            if _CUSTOMER_RE.search(line):
                 customer_lines += 1
-            elif any(indicator in line_lower for indicator in staff_indicators):
+            elif _STAFF_RE.search(line):
                 staff_lines += 1
         
         total_lines = len(lines)
@@ -257,80 +984,56 @@ def analyze_conversation_flow(text: str) -> Dict[str, any]:
         print(f"Conversation flow analysis error: {e}")
         return {"total_lines": 0, "customer_lines": 0, "staff_lines": 0, "customer_ratio": 0, "staff_ratio": 0}
 
+# The extended bucket table; phrase lists and matching live in pipeline_common
+_ENHANCED_BUCKETS = BucketClassifier(ENHANCED_BUCKET_WORDS)
+
+@memoize_text
 def classify_buckets(text: str) -> Dict[str, Dict[str, float]]:
     """Enhanced classification with more categories"""
     try:
-        low = text.lower()
-        
-        # Objections
-        objections = {
-            "Price": 1.0 if any(w in low for w in ["price","expensive","costly","too much","cheap","budget"]) else 0.0,
-            "Stock": 1.0 if any(w in low for w in ["stock","out of stock","available","inventory","sold out"]) else 0.0,
-            "SizeFit": 1.0 if any(w in low for w in ["size","fit","fitting","small","large","tight","loose"]) else 0.0,
-            "Quality": 1.0 if any(w in low for w in ["quality","defect","damaged","broken","poor","bad"]) else 0.0,
-            "Knowledge": 1.0 if any(w in low for w in ["don't know","not sure","confused","unclear"]) else 0.0,
-            "Process": 1.0 if any(w in low for w in ["process","policy","return policy","exchange policy","billing","payment"]) else 0.0,
-            "Delivery": 1.0 if any(w in low for w in ["delivery","shipping","late","delay","tracking"]) else 0.0,
-            "Support": 1.0 if any(w in low for w in ["support","help","assistance","service"]) else 0.0,
-        }
-        
-        # Handling
-        handling = {
-            "Solution": 1.0 if any(w in low for w in ["we can do","solution","offer","replace","refund","exchange","fix"]) else 0.0,
-            "Explanation": 1.0 if any(w in low for w in ["because","due to","the reason","explains","clarify"]) else 0.0,
-            "Empathy": 1.0 if any(w in low for w in ["understand","sorry","apologize","feel","empathize"]) else 0.0,
-            "Escalation": 1.0 if any(w in low for w in ["manager","supervisor","escalate","higher"]) else 0.0,
-            "Other": 1.0
-        }
-        
-        # Red flags
-        redflags = {
-            "Disrespect": 1.0 if any(w in low for w in ["shut up","nonsense","idiot","stupid","rude"]) else 0.0,
-            "Inventory": 1.0 if "out of stock" in low else 0.0,
-            "Process": 1.0 if any(w in low for w in ["skip bill","no receipt","bypass"]) else 0.0,
-            "Knowledge": 1.0 if "don't know" in low else 0.0,
-            "Team": 1.0 if "manager not available" in low else 0.0,
-            "Escalation": 1.0 if any(w in low for w in ["escalate","manager","supervisor"]) else 0.0,
-        }
-        
-        return {"objections": objections, "handling": handling, "redflags": redflags}
+        return _ENHANCED_BUCKETS.classify(text.lower())
     except Exception as e:
         print(f"Classification error: {e}")
-        return {"objections": {}, "handling": {}, "redflags": {}}
+        return uncached(_ENHANCED_BUCKETS.empty())
 
 def compute_metrics(buckets: Dict[str, Dict[str,float]], weights: Dict[str,int]) -> Dict[str,float]:
+    """pipeline_common's metrics plus objection and handling totals"""
+    metrics = pipeline_common.compute_metrics(buckets, weights)
     try:
-        rf = sum(weights.get(k,1) * v for k,v in buckets["redflags"].items())
-        sentiment = 0.0  # computed separately
         handling_other = buckets["handling"].get("Other",0.0)
-        
-        # Additional metrics
         total_objections = sum(buckets["objections"].values())
         total_handling = sum(buckets["handling"].values())
         handling_effectiveness = (total_handling - handling_other) / max(total_handling, 1)
-        
-        return {
-            "red_flag_score": rf,
-            "handling_Other": handling_other*100.0,
+        metrics.update({
             "total_objections": total_objections,
             "total_handling": total_handling,
             "handling_effectiveness": handling_effectiveness * 100.0
-        }
+        })
     except Exception as e:
         print(f"Metrics computation error: {e}")
-        return {"red_flag_score": 0.0, "handling_Other": 100.0}
+    return metrics
 
 def process_audio_to_packet(wav_path: str, cfg: Dict, lang_hint="auto") -> Dict:
     """Enhanced audio processing with multilingual support"""
     try:
         print(f"Processing audio: {wav_path}")
         
-        # VAD
-        segs = webrtc_vad_segments(wav_path)
+        # VAD; the decoded 16 kHz signal is reused for STT
+        try:
+            segs, audio = vad_segments_with_audio(wav_path)
+            speech_segments = segs
+        except Exception as e:
+            print(f"VAD error: {e}")
+            segs = [(0.0, 2.0)]
+            audio = wav_path
+            speech_segments = None  # let Whisper find speech itself
         print(f"VAD segments: {len(segs)}")
         
-        # STT
-        text = transcribe_whisper(wav_path, size=cfg["stt"]["size"], device=cfg["stt"]["device"], lang_hint=lang_hint)
+        # STT, decoding only the VAD speech spans
+        text = transcribe_whisper(audio, size=cfg["stt"]["size"], device=cfg["stt"]["device"],
+                                  lang_hint=lang_hint, compute_type=cfg["stt"].get("compute_type", "auto"),
+                                  speech_segments=speech_segments)
+        del audio
         print(f"Transcription: {text[:100]}...")
         
         if not text.strip() or "Error in transcription" in text:
@@ -348,21 +1051,27 @@ def process_audio_to_packet(wav_path: str, cfg: Dict, lang_hint="auto") -> Dict:
         # PII Redaction
         text = redact(text)
         
-        # NLP Processing
-        summ = summarize(text)
-        kws = keywords(text)
-        sent = sentiment_score(text)
-        buckets = classify_buckets(text)
-        metrics = compute_metrics(buckets, cfg["weights_redflag"])
-        metrics["sentiment"] = sent
-        
-        # Conversation Analysis
-        conversation_flow = analyze_conversation_flow(text)
-        
-        # Translation
-        translations = {}
-        if lang_hint != "hi":
-            translations["hi"] = translate_text(text, "hi")
+        # NLP Processing: the stages are independent and their model calls
+        # release the GIL, so run them side by side
+        with ThreadPoolExecutor(max_workers=NLP_WORKERS) as ex:
+            f_summ = ex.submit(summarize, text)
+            f_kws = ex.submit(keywords, text)
+            f_sent = ex.submit(sentiment_score, text)
+            f_tr = ex.submit(translate_text, text, "hi") if lang_hint != "hi" else None
+            buckets = classify_buckets(text)
+            metrics = compute_metrics(buckets, cfg["weights_redflag"])
+            
+            # Conversation Analysis
+            conversation_flow = analyze_conversation_flow(text)
+            
+            summ = f_summ.result()
+            kws = f_kws.result()
+            metrics["sentiment"] = f_sent.result()
+            
+            # Translation
+            translations = {}
+            if f_tr is not None:
+                translations["hi"] = f_tr.result()
         
         return {
             "transcript": text,
@@ -0,0 +1,220 @@
+"""Model-free pieces shared by the pipelines: audio resampling, bucket
+classification, metrics, and the extractive/keyword fallbacks.
+
+The text helpers take an optional `low` (text.lower()), so a caller that
+runs several of them lowercases the transcript once."""
+import re
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; buckets fall back to per-bucket regexes
+    ahocorasick = None
+
+def resample(audio: np.ndarray, sr: int, target_sr: int) -> np.ndarray:
+    """Mono audio from sr to target_sr with libsoxr's HQ filter"""
+    try:
+        import soxr  # libsoxr C resampler, several times faster than librosa
+        return soxr.resample(audio, sr, target_sr, quality="HQ")
+    except ImportError:
+        import librosa
+        # librosa's default soxr_hq needs soxr too; polyphase (scipy's C
+        # resample_poly) avoids the slow resampy path
+        return librosa.resample(audio, orig_sr=sr, target_sr=target_sr, res_type="polyphase")
+
+# Stop words for the simple keyword extractor
+_STOPWORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by",
+    "is", "are", "was", "were", "be", "been", "have", "has", "had", "do", "does", "did",
+    "will", "would", "could", "should", "may", "might", "can", "this", "that", "these",
+    "those", "i", "you", "he", "she", "it", "we", "they",
+})
+_WORD_RE = re.compile(r"[a-z]{4,}")
+
+# Word lists for the keyword sentiment heuristic
+_POSITIVE_WORDS = ("good", "great", "excellent", "happy", "satisfied", "love", "like", "perfect", "amazing", "wonderful")
+_NEGATIVE_WORDS = ("bad", "terrible", "awful", "hate", "angry", "frustrated", "disappointed", "poor", "worst", "horrible")
+
+# Keyword lists per bucket; matched as plain substrings of the lowercased text
+_BUCKET_WORDS: Dict[str, Dict[str, List[str]]] = {
+    "objections": {
+        "Price": ["price","expensive","costly","too much"],
+        "Stock": ["stock","out of stock","available","inventory"],
+        "SizeFit": ["size","fit","fitting"],
+        "Quality": ["quality","defect","damaged","broken"],
+        "Knowledge": ["don't know","not sure","confused"],
+        "Process": ["process","policy","return policy","exchange policy","billing"],
+    },
+    "handling": {
+        "Solution": ["we can do","solution","offer","replace","refund","exchange"],
+        "Explanation": ["because","due to","the reason","explains"],
+    },
+    "redflags": {
+        "Disrespect": ["shut up","nonsense","idiot"],
+        "Inventory": ["out of stock"],
+        "Process": ["skip bill","no receipt"],
+        "Knowledge": ["don't know"],
+        "Team": ["manager not available"],
+    },
+}
+
+# pipeline.py's extended buckets: more phrases, plus Delivery, Support,
+# Empathy and Escalation buckets
+ENHANCED_BUCKET_WORDS: Dict[str, Dict[str, List[str]]] = {
+    "objections": {
+        "Price": ["price","expensive","costly","too much","cheap","budget"],
+        "Stock": ["stock","out of stock","available","inventory","sold out"],
+        "SizeFit": ["size","fit","fitting","small","large","tight","loose"],
+        "Quality": ["quality","defect","damaged","broken","poor","bad"],
+        "Knowledge": ["don't know","not sure","confused","unclear"],
+        "Process": ["process","policy","return policy","exchange policy","billing","payment"],
+        "Delivery": ["delivery","shipping","late","delay","tracking"],
+        "Support": ["support","help","assistance","service"],
+    },
+    "handling": {
+        "Solution": ["we can do","solution","offer","replace","refund","exchange","fix"],
+        "Explanation": ["because","due to","the reason","explains","clarify"],
+        "Empathy": ["understand","sorry","apologize","feel","empathize"],
+        "Escalation": ["manager","supervisor","escalate","higher"],
+    },
+    "redflags": {
+        "Disrespect": ["shut up","nonsense","idiot","stupid","rude"],
+        "Inventory": ["out of stock"],
+        "Process": ["skip bill","no receipt","bypass"],
+        "Knowledge": ["don't know"],
+        "Team": ["manager not available"],
+        "Escalation": ["escalate","manager","supervisor"],
+    },
+}
+
+class BucketClassifier:
+    """Flags which buckets of a {group: {bucket: phrases}} table occur in a
+    lowercased text, in one Aho-Corasick pass over it when pyahocorasick is
+    installed, else with one compiled regex per bucket"""
+    
+    def __init__(self, bucket_words: Dict[str, Dict[str, List[str]]]):
+        self.bucket_words = bucket_words
+        self._automaton = self._build_automaton(bucket_words)
+        self._patterns = None
+        if self._automaton is None:
+            self._patterns = {
+                group: {bucket: re.compile("|".join(map(re.escape, words))) for bucket, words in buckets.items()}
+                for group, buckets in bucket_words.items()
+            }
+    
+    @staticmethod
+    def _build_automaton(bucket_words: Dict[str, Dict[str, List[str]]]):
+        # Every phrase once, tagged with the (group, bucket) pairs it belongs to
+        if ahocorasick is None:
+            return None
+        tags = {}
+        for group, buckets in bucket_words.items():
+            for bucket, words in buckets.items():
+                for w in words:
+                    tags.setdefault(w, []).append((group, bucket))
+        automaton = ahocorasick.Automaton()
+        for w, t in tags.items():
+            automaton.add_word(w, tuple(t))
+        automaton.make_automaton()
+        return automaton
+    
+    def empty(self) -> Dict[str, Dict[str, float]]:
+        """All buckets at 0.0 except handling "Other"; a fresh dict per call"""
+        result = {group: dict.fromkeys(buckets, 0.0) for group, buckets in self.bucket_words.items()}
+        result["handling"]["Other"] = 1.0
+        return result
+    
+    def classify(self, low: str) -> Dict[str, Dict[str, float]]:
+        result = self.empty()
+        if self._automaton is not None:
+            for _, tags in self._automaton.iter(low):
+                for group, bucket in tags:
+                    result[group][bucket] = 1.0
+        else:
+            for group, patterns in self._patterns.items():
+                for bucket, rx in patterns.items():
+                    if rx.search(low):
+                        result[group][bucket] = 1.0
+        return result
+
+_BUCKETS = BucketClassifier(_BUCKET_WORDS)
+
+def empty_buckets() -> Dict[str, Dict[str, float]]:
+    """All buckets at 0.0 except handling "Other"; a fresh dict per call"""
+    return _BUCKETS.empty()
+
+def error_packet(transcript: str) -> Dict:
+    """Packet returned when processing an audio file fails"""
+    return {
+        "transcript": transcript,
+        "summary": "Unable to process audio file",
+        "keywords": ["error", "processing"],
+        "buckets": empty_buckets(),
+        "segments": [(0.0, 5.0)],
+        "metrics": {"red_flag_score": 0.0, "handling_Other": 100.0, "sentiment": 0.0},
+    }
+
+def extractive_summary(text: str) -> str:
+    # First and last sentences
+    sentences = [s.strip() for s in text.split(".") if s.strip()]
+    if len(sentences) <= 2:
+        return text
+    return f"{sentences[0]}. {sentences[-1]}."
+
+def simple_keywords(text: str, top_k: int, low: Optional[str] = None) -> List[str]:
+    # First unique 4+ letter non-stop words; stops scanning once top_k are found
+    out, seen = [], set()
+    if top_k <= 0:
+        return out
+    for m in _WORD_RE.finditer(low if low is not None else text.lower()):
+        t = m.group()
+        if t not in seen and t not in _STOPWORDS:
+            seen.add(t)
+            out.append(t)
+            if len(out) >= top_k:
+                break
+    return out
+
+def keyword_sentiment(text: str, low: Optional[str] = None) -> float:
+    text_lower = low if low is not None else text.lower()
+    positive_count = sum(1 for word in _POSITIVE_WORDS if word in text_lower)
+    negative_count = sum(1 for word in _NEGATIVE_WORDS if word in text_lower)
+    if positive_count > negative_count:
+        return 0.5
+    elif negative_count > positive_count:
+        return -0.5
+    else:
+        return 0.0
+
+def classify_buckets(text: str, low: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    try:
+        return _BUCKETS.classify(low if low is not None else text.lower())
+    except Exception as e:
+        print(f"Classification error: {e}")
+        return empty_buckets()
+
+# Red-flag keys -> (weights dict, weight vector); the bucket schema and the
+# configured weights are fixed, so the vector is built once
+_RF_WEIGHTS: Dict[Tuple[str, ...], Tuple[Dict[str,int], np.ndarray]] = {}
+
+def _redflag_weight_vector(keys: Tuple[str, ...], weights: Dict[str,int]) -> np.ndarray:
+    cached = _RF_WEIGHTS.get(keys)
+    if cached is None or cached[0] is not weights:
+        cached = (weights, np.array([weights.get(k,1) for k in keys], dtype=np.float64))
+        _RF_WEIGHTS[keys] = cached
+    return cached[1]
+
+def compute_metrics(buckets: Dict[str, Dict[str,float]], weights: Dict[str,int]) -> Dict[str,float]:
+    try:
+        redflags = buckets["redflags"]
+        keys = tuple(redflags)
+        values = np.fromiter(redflags.values(), dtype=np.float64, count=len(keys))
+        rf = float(_redflag_weight_vector(keys, weights) @ values)
+        handling_other = buckets["handling"].get("Other",0.0)
+        return {
+            "red_flag_score": rf,
+            "handling_Other": handling_other*100.0
+        }
+    except Exception as e:
+        print(f"Metrics error: {e}")
+        return {"red_flag_score": 0.0, "handling_Other": 100.0}
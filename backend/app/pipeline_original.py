@@ -1,46 +1,89 @@
-import os, io, math, tempfile
-from typing import Dict, List, Tuple
-import signal
+import os, io, math, tempfile, threading
+from typing import Dict, List, Tuple, Optional
 import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from faster_whisper import WhisperModel
+try:
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:  # faster-whisper < 1.1 has no batched VAD path
+    BatchedInferencePipeline = None
 from transformers import pipeline as hf_pipeline
 from keybert import KeyBERT
 from sentence_transformers import SentenceTransformer
 import webrtcvad
 import soundfile as sf
+import numpy as np
+try:
+    from numba import njit
+except ImportError:  # numba is optional; VAD runs are merged with NumPy instead
+    njit = None
 from .pii import redact
+from .pipeline import memoize_text, uncached, ONNXSBertEncoder, KEYBERT_ONNX_DIR, _keybert_backend, _batched_clips
+from . import pipeline_common
+from .pipeline_common import compute_metrics, error_packet, extractive_summary, keyword_sentiment, resample, simple_keywords
 
 # STT model cache (lazy)
 _whisper_model = None
+_whisper_batched = None
 _summary_pipe = None
 _sentiment_pipe = None
 _kw_model = None
 
-class TimeoutError(Exception):
-    pass
+# Model calls run here so callers can stop waiting after a timeout; unlike
+# SIGALRM this works off the main thread (uvicorn workers, executors).
+# STT has its own pool, and the NLP pool fits the three model stages of
+# two uploads at once, so one upload's stages don't queue behind another's.
+_STT_EX = ThreadPoolExecutor(max_workers=2)
+_EX = ThreadPoolExecutor(max_workers=3 * 2)
 
-def timeout_handler(signum, frame):
-    raise TimeoutError("Operation timed out")
+def _call_with_timeout(pool: ThreadPoolExecutor, seconds: float, fn, *args, **kwargs):
+    """fn(*args, **kwargs) on pool, giving up after `seconds` of run time.
+    
+    The clock starts when a worker picks the call up, so time spent queued
+    behind other calls doesn't count against it; a call still queued after
+    `seconds` is cancelled. Raises FutureTimeoutError either way. A call
+    that times out while running finishes in the background.
+    """
+    started = threading.Event()
+    def run():
+        started.set()
+        return fn(*args, **kwargs)
+    fut = pool.submit(run)
+    if not started.wait(seconds) and fut.cancel():
+        raise FutureTimeoutError()
+    started.wait()  # cancel() lost the race: the call has just started
+    return fut.result(timeout=seconds)
 
-def load_whisper(size="base", device="auto"):
-    global _whisper_model
+def load_whisper(size="base", device="auto", compute_type="auto"):
+    global _whisper_model, _whisper_batched
     if _whisper_model is None:
         try:
-            print(f"Loading Whisper model: {size}")
-            compute_type = "int8" if device != "cuda" else "float16"
-            _whisper_model = WhisperModel(size, device="auto", compute_type=compute_type)
+            print(f"Loading Whisper model: {size} ({compute_type})")
+            # "auto" lets CTranslate2 pick the fastest type the device supports
+            _whisper_model = WhisperModel(size, device=device, compute_type=compute_type)
+            if BatchedInferencePipeline is not None:
+                _whisper_batched = BatchedInferencePipeline(model=_whisper_model)
             print("Whisper model loaded successfully")
         except Exception as e:
             print(f"Error loading Whisper: {e}")
             raise
     return _whisper_model
 
+def _quantize_int8(pipe):
+    """Dynamic INT8 quantization of the pipeline model's Linear layers (CPU only)"""
+    import torch
+    if pipe.device.type == "cpu":
+        pipe.model = torch.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipe
+
 def load_summarizer():
     global _summary_pipe
     if _summary_pipe is None:
         try:
             print("Loading summarization model...")
-            _summary_pipe = hf_pipeline("summarization", model="facebook/bart-large-cnn")
+            _summary_pipe = _quantize_int8(hf_pipeline("summarization", model="facebook/bart-large-cnn"))
+            _summary_pipe.tokenizer.model_max_length = 1024  # BART encoder positions
             print("Summarization model loaded successfully")
         except Exception as e:
             print(f"Error loading summarizer: {e}")
@@ -52,11 +95,11 @@ def load_sentiment():
     if _sentiment_pipe is None:
         try:
             print("Loading sentiment model...")
-            _sentiment_pipe = hf_pipeline(
+            _sentiment_pipe = _quantize_int8(hf_pipeline(
                 "text-classification",
                 model="cardiffnlp/twitter-xlm-roberta-base-sentiment",
                 top_k=None
-            )
+            ))
             print("Sentiment model loaded successfully")
         except Exception as e:
             print(f"Error loading sentiment model: {e}")
@@ -68,7 +111,14 @@ def load_keybert():
     if _kw_model is None:
         try:
             print("Loading KeyBERT model...")
-            _kw_model = KeyBERT(SentenceTransformer("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"))
+            if os.path.isdir(KEYBERT_ONNX_DIR):
+                # INT8 ONNX MiniLM export from `make models`
+                try:
+                    _kw_model = KeyBERT(_keybert_backend(ONNXSBertEncoder(KEYBERT_ONNX_DIR)))
+                except Exception as e:
+                    print(f"ONNX encoder unavailable, using SentenceTransformer: {e}")
+            if _kw_model is None:
+                _kw_model = KeyBERT(SentenceTransformer("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"))
             print("KeyBERT model loaded successfully")
         except Exception as e:
             print(f"Error loading KeyBERT: {e}")
@@ -77,76 +127,128 @@ def load_keybert():
 
 def webrtc_vad_segments(wav_path: str, sample_rate=16000, frame_ms=30) -> List[Tuple[float,float]]:
     try:
-        print(f"Processing VAD for: {wav_path}")
-        audio, sr = sf.read(wav_path)
-        if sr != sample_rate:
-            # Use librosa for proper resampling
-            import librosa
-            audio = librosa.resample(audio, orig_sr=sr, target_sr=sample_rate)
-            sr = sample_rate
-        if audio.ndim > 1:
-            audio = audio.mean(axis=1)
-        
-        pcm16 = (audio * 32767).astype("int16").tobytes()
-        vad = webrtcvad.Vad(2)
-        frame_len = int(sample_rate * frame_ms / 1000) * 2
-        frames = [pcm16[i:i+frame_len] for i in range(0, len(pcm16), frame_len)]
-        
-        segs = []
-        cur_start = None
-        t = 0.0
-        step = frame_ms / 1000.0
-        
-        for f in frames:
-            is_speech = vad.is_speech(f, sample_rate)
-            if is_speech and cur_start is None:
-                cur_start = t
-            if not is_speech and cur_start is not None:
-                segs.append((cur_start, t))
-                cur_start = None
-            t += step
-        
-        if cur_start is not None:
-            segs.append((cur_start, t))
-        
-        # Merge short gaps
-        merged = []
-        for s,e in segs:
-            if merged and s - merged[-1][1] < 0.2:  # 200ms gap
-                merged[-1] = (merged[-1][0], e)
-            else:
-                merged.append((s,e))
-        
-        print(f"VAD found {len(merged)} segments")
-        return merged
+        return vad_segments(wav_path, sample_rate, frame_ms)
     except Exception as e:
         print(f"VAD error: {e}")
         return [(0.0, 5.0)]  # Default segment
 
-def transcribe_whisper(wav_path: str, size="base", device="auto", lang_hint="auto") -> str:
+def _speech_flags(vad, pcm: np.ndarray, sample_rate: int) -> np.ndarray:
+    # One webrtcvad decision per row of an (n_frames, frame_samples) int16 array
+    return np.fromiter((vad.is_speech(pcm[i].tobytes(), sample_rate) for i in range(pcm.shape[0])),
+                       dtype=bool, count=pcm.shape[0])
+
+def _speech_runs_numpy(speech: np.ndarray, frame_ms: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(start, end) frame indices of speech runs, merging gaps under 200 ms"""
+    # Run edges: +1 where speech starts, -1 one past where it ends
+    edges = np.diff(np.concatenate(([0], speech.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts):
+        keep = (starts[1:] - ends[:-1]) * frame_ms >= 200  # 200ms gap
+        starts = starts[np.concatenate(([True], keep))]
+        ends = ends[np.concatenate((keep, [True]))]
+    return starts, ends
+
+def _speech_runs_loop(speech, frame_ms):
+    # Same result as _speech_runs_numpy in one pass, without the edge and
+    # mask temporaries; only worth it compiled
+    n = speech.shape[0]
+    starts = np.empty(n // 2 + 1, np.int64)
+    ends = np.empty(n // 2 + 1, np.int64)
+    k = 0
+    i = 0
+    while i < n:
+        if speech[i]:
+            j = i
+            while j < n and speech[j]:
+                j += 1
+            if k > 0 and (i - ends[k - 1]) * frame_ms < 200:
+                ends[k - 1] = j
+            else:
+                starts[k] = i
+                ends[k] = j
+                k += 1
+            i = j
+        else:
+            i += 1
+    return starts[:k], ends[:k]
+
+_speech_runs = njit(cache=True)(_speech_runs_loop) if njit is not None else _speech_runs_numpy
+
+def vad_segments(wav_path: str, sample_rate=16000, frame_ms=30) -> List[Tuple[float,float]]:
+    """Speech segments via webrtcvad; raises on unreadable audio"""
+    print(f"Processing VAD for: {wav_path}")
+    frame_samples = int(sample_rate * frame_ms / 1000)
+    vad = webrtcvad.Vad(2)
+    
+    with sf.SoundFile(wav_path) as f:
+        native = f.samplerate == sample_rate
+        if native:
+            # Stream int16 blocks straight into VAD frames, so the whole file
+            # is never decoded at once; a partial frame carries to the next block
+            flags = []
+            tail = np.empty(0, dtype=np.int16)
+            for block in f.blocks(blocksize=frame_samples * 64, dtype="int16", always_2d=True):
+                mono = block[:, 0] if block.shape[1] == 1 else block.mean(axis=1).astype(np.int16)
+                buf = np.concatenate((tail, mono))
+                n = (len(buf) // frame_samples) * frame_samples
+                flags.append(_speech_flags(vad, buf[:n].reshape(-1, frame_samples), sample_rate))
+                tail = buf[n:]
+            speech = np.concatenate(flags) if flags else np.zeros(0, dtype=bool)
+    
+    if not native:
+        audio, sr = sf.read(wav_path, dtype="float32")
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        audio = resample(audio, sr, sample_rate)
+        
+        # Whole frames only, as an (n_frames, frame_samples) int16 array
+        n = (len(audio) // frame_samples) * frame_samples
+        pcm = np.clip(audio[:n] * 32767, -32768, 32767).astype(np.int16).reshape(-1, frame_samples)
+        speech = _speech_flags(vad, pcm, sample_rate)
+    
+    starts, ends = _speech_runs(speech, int(frame_ms))
+    step = frame_ms / 1000.0
+    merged = [(float(s * step), float(e * step)) for s, e in zip(starts, ends)]
+    
+    print(f"VAD found {len(merged)} segments")
+    return merged
+
+def transcribe_whisper(wav_path: str, size="base", device="auto", lang_hint="auto", compute_type="auto",
+                       speech_segments: Optional[List[Tuple[float,float]]] = None) -> str:
+    """With speech_segments, only those spans are decoded and Whisper's own VAD pass is skipped"""
     try:
         print(f"Starting transcription: {wav_path}")
-        model = load_whisper(size=size, device=device)
-        
-        # Set timeout for transcription
-        signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(60)  # 60 second timeout
+        model = load_whisper(size=size, device=device, compute_type=compute_type)
         
         try:
-            segments, info = model.transcribe(wav_path, beam_size=1, language=None if lang_hint=="auto" else lang_hint)
-            text = " ".join([s.text.strip() for s in segments])
-            signal.alarm(0)  # Cancel timeout
+            text = _call_with_timeout(_STT_EX, 60, _transcribe, model, wav_path, lang_hint, speech_segments)
             print(f"Transcription completed: {len(text)} characters")
-            return text.strip()
-        except TimeoutError:
+            return text
+        except FutureTimeoutError:
             print("Transcription timed out")
             return "Transcription timed out"
-        finally:
-            signal.alarm(0)  # Ensure timeout is cancelled
     except Exception as e:
         print(f"Transcription error: {e}")
         return f"Error in transcription: {str(e)}"
 
+def _transcribe(model, wav_path: str, lang_hint: str,
+                speech_segments: Optional[List[Tuple[float,float]]]) -> str:
+    language = None if lang_hint=="auto" else lang_hint
+    use_vad = not speech_segments
+    if _whisper_batched is not None:
+        # Decode the VAD-detected speech chunks in parallel batches
+        segments, info = _whisper_batched.transcribe(
+            wav_path, batch_size=16, beam_size=1, vad_filter=use_vad, language=language,
+            clip_timestamps=None if use_vad else _batched_clips(speech_segments))
+    else:
+        segments, info = model.transcribe(
+            wav_path, beam_size=1, language=language,
+            clip_timestamps="0" if use_vad else [t for seg in speech_segments for t in seg])
+    # Segments are generated lazily; joining them is the actual decode
+    return " ".join([s.text.strip() for s in segments]).strip()
+
+@memoize_text
 def summarize(text: str) -> str:
     try:
         if len(text) < 50:
@@ -154,37 +256,19 @@ def summarize(text: str) -> str:
         
         sp = load_summarizer()
         if sp is None:
-            # Fallback extractive summary
-            sentences = [s.strip() for s in text.split(".") if s.strip()]
-            if len(sentences) <= 2:
-                return text
-            return f"{sentences[0]}. {sentences[-1]}."
-        
-        # Set timeout for summarization
-        signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(30)  # 30 second timeout
+            return uncached(extractive_summary(text))  # Fallback
         
         try:
-            out = sp(text[:3000], max_length=128, min_length=40, do_sample=False)
-            signal.alarm(0)
+            out = _call_with_timeout(_EX, 30, sp, text[:3000], max_length=128, min_length=40, do_sample=False, truncation=True)
             return out[0]["summary_text"]
-        except TimeoutError:
+        except FutureTimeoutError:
             print("Summarization timed out")
-            # Fallback
-            sentences = [s.strip() for s in text.split(".") if s.strip()]
-            if len(sentences) <= 2:
-                return text
-            return f"{sentences[0]}. {sentences[-1]}."
-        finally:
-            signal.alarm(0)
+            return uncached(extractive_summary(text))
     except Exception as e:
         print(f"Summary error: {e}")
-        # Fallback extractive summary
-        sentences = [s.strip() for s in text.split(".") if s.strip()]
-        if len(sentences) <= 2:
-            return text
-        return f"{sentences[0]}. {sentences[-1]}."
+        return uncached(extractive_summary(text))
 
+@memoize_text
 def keywords(text: str, top_k=8) -> List[str]:
     try:
         if len(text) < 20:
@@ -193,33 +277,23 @@ def keywords(text: str, top_k=8) -> List[str]:
         print("Extracting keywords...")
         kw = load_keybert()
         
-        # Set timeout for keyword extraction
-        signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(30)  # 30 second timeout
-        
         try:
-            pairs = kw.extract_keywords(text, keyphrase_ngram_range=(1,2), top_n=top_k, stop_words="english")
-            signal.alarm(0)
-            keywords = list(dict.fromkeys([p[0] for p in pairs]))
+            pairs = _call_with_timeout(_EX, 30, kw.extract_keywords, text, keyphrase_ngram_range=(1,2), top_n=top_k, stop_words="english")
+            seen = set()
+            keywords = [p[0] for p in pairs if not (p[0] in seen or seen.add(p[0]))]
             print(f"Extracted {len(keywords)} keywords")
             return keywords
-        except TimeoutError:
+        except FutureTimeoutError:
             print("Keyword extraction timed out")
-            # Fallback simple keyword extraction
-            words = text.lower().split()
-            common_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by", "is", "are", "was", "were", "be", "been", "have", "has", "had", "do", "does", "did", "will", "would", "could", "should", "may", "might", "can", "this", "that", "these", "those", "i", "you", "he", "she", "it", "we", "they"}
-            keywords = [w for w in words if len(w) > 3 and w not in common_words]
-            return list(dict.fromkeys(keywords))[:top_k]
-        finally:
-            signal.alarm(0)
+            return uncached(simple_keywords(text, top_k))
     except Exception as e:
         print(f"Keywords error: {e}")
-        # Fallback simple keyword extraction
-        words = text.lower().split()
-        common_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by", "is", "are", "was", "were", "be", "been", "have", "has", "had", "do", "does", "did", "will", "would", "could", "should", "may", "might", "can", "this", "that", "these", "those", "i", "you", "he", "she", "it", "we", "they"}
-        keywords = [w for w in words if len(w) > 3 and w not in common_words]
-        return list(dict.fromkeys(keywords))[:top_k]
+        return uncached(simple_keywords(text, top_k))
+
+# Sentiment label -> signed weight
+_SENT_MAP = {"negative": -1.0, "neutral": 0.0, "positive": 1.0}
 
+@memoize_text
 def sentiment_score(text: str) -> float:
     try:
         if not text.strip():
@@ -228,91 +302,20 @@ def sentiment_score(text: str) -> float:
         print("Analyzing sentiment...")
         sp = load_sentiment()
         
-        # Set timeout for sentiment analysis
-        signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(30)  # 30 second timeout
-        
         try:
-            scores = sp(text[:1000])[0]  # returns list of dicts
-            signal.alarm(0)
-            mapping = {"negative": -1.0, "neutral": 0.0, "positive": 1.0}
-            sentiment = sum(mapping.get(s["label"].lower(),0) * s["score"] for s in scores)
+            scores = _call_with_timeout(_EX, 30, sp, text[:1000])[0]  # returns list of dicts
+            sentiment = sum(_SENT_MAP.get(s["label"].lower(), 0.0) * s["score"] for s in scores)
             print(f"Sentiment score: {sentiment}")
             return sentiment
-        except TimeoutError:
+        except FutureTimeoutError:
             print("Sentiment analysis timed out")
-            # Fallback simple sentiment
-            positive_words = ["good", "great", "excellent", "happy", "satisfied", "love", "like", "perfect", "amazing", "wonderful"]
-            negative_words = ["bad", "terrible", "awful", "hate", "angry", "frustrated", "disappointed", "poor", "worst", "horrible"]
-            text_lower = text.lower()
-            positive_count = sum(1 for word in positive_words if word in text_lower)
-            negative_count = sum(1 for word in negative_words if word in text_lower)
-            if positive_count > negative_count:
-                return 0.5
-            elif negative_count > positive_count:
-                return -0.5
-            else:
-                return 0.0
-        finally:
-            signal.alarm(0)
+            return uncached(keyword_sentiment(text))
     except Exception as e:
         print(f"Sentiment error: {e}")
-        # Fallback simple sentiment
-        positive_words = ["good", "great", "excellent", "happy", "satisfied", "love", "like", "perfect", "amazing", "wonderful"]
-        negative_words = ["bad", "terrible", "awful", "hate", "angry", "frustrated", "disappointed", "poor", "worst", "horrible"]
-        text_lower = text.lower()
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
-        if positive_count > negative_count:
-            return 0.5
-        elif negative_count > positive_count:
-            return -0.5
-        else:
-            return 0.0
+        return uncached(keyword_sentiment(text))
 
-def classify_buckets(text: str) -> Dict[str, Dict[str, float]]:
-    try:
-        low = text.lower()
-        objections = {
-            "Price": 1.0 if any(w in low for w in ["price","expensive","costly","too much"]) else 0.0,
-            "Stock": 1.0 if any(w in low for w in ["stock","out of stock","available","inventory"]) else 0.0,
-            "SizeFit": 1.0 if any(w in low for w in ["size","fit","fitting"]) else 0.0,
-            "Quality": 1.0 if any(w in low for w in ["quality","defect","damaged","broken"]) else 0.0,
-            "Knowledge": 1.0 if any(w in low for w in ["don't know","not sure","confused"]) else 0.0,
-            "Process": 1.0 if any(w in low for w in ["process","policy","return policy","exchange policy","billing"]) else 0.0,
-        }
-        handling = {
-            "Solution": 1.0 if any(w in low for w in ["we can do","solution","offer","replace","refund","exchange"]) else 0.0,
-            "Explanation": 1.0 if any(w in low for w in ["because","due to","the reason","explains"]) else 0.0,
-            "Other": 1.0
-        }
-        redflags = {
-            "Disrespect": 1.0 if any(w in low for w in ["shut up","nonsense","idiot"]) else 0.0,
-            "Inventory": 1.0 if "out of stock" in low else 0.0,
-            "Process": 1.0 if "skip bill" in low or "no receipt" in low else 0.0,
-            "Knowledge": 1.0 if "don't know" in low else 0.0,
-            "Team": 1.0 if "manager not available" in low else 0.0,
-        }
-        return {"objections": objections, "handling": handling, "redflags": redflags}
-    except Exception as e:
-        print(f"Classification error: {e}")
-        return {
-            "objections": {"Price": 0.0, "Stock": 0.0, "SizeFit": 0.0, "Quality": 0.0, "Knowledge": 0.0, "Process": 0.0},
-            "handling": {"Solution": 0.0, "Explanation": 0.0, "Other": 1.0},
-            "redflags": {"Disrespect": 0.0, "Inventory": 0.0, "Process": 0.0, "Knowledge": 0.0, "Team": 0.0}
-        }
-
-def compute_metrics(buckets: Dict[str, Dict[str,float]], weights: Dict[str,int]) -> Dict[str,float]:
-    try:
-        rf = sum(weights.get(k,1) * v for k,v in buckets["redflags"].items())
-        handling_other = buckets["handling"].get("Other",0.0)
-        return {
-            "red_flag_score": rf,
-            "handling_Other": handling_other*100.0
-        }
-    except Exception as e:
-        print(f"Metrics error: {e}")
-        return {"red_flag_score": 0.0, "handling_Other": 100.0}
+# Shared classifier, cached per transcript like the model stages
+classify_buckets = memoize_text(pipeline_common.classify_buckets)
 
 def process_audio_to_packet(wav_path: str, cfg: Dict, lang_hint="auto") -> Dict:
     try:
@@ -321,24 +324,37 @@ def process_audio_to_packet(wav_path: str, cfg: Dict, lang_hint="auto") -> Dict:
         
         # VAD
         print("Step 1: Voice Activity Detection")
-        segs = webrtc_vad_segments(wav_path)
+        try:
+            segs = vad_segments(wav_path)
+            speech_segments = segs
+        except Exception as e:
+            # Let Whisper run its own VAD over the whole file
+            print(f"VAD error: {e}")
+            segs, speech_segments = [(0.0, 5.0)], None
         
         # STT
         print("Step 2: Speech-to-Text")
-        text = transcribe_whisper(wav_path, size=cfg["stt"]["size"], device=cfg["stt"]["device"], lang_hint=lang_hint)
+        text = transcribe_whisper(wav_path, size=cfg["stt"]["size"], device=cfg["stt"]["device"], lang_hint=lang_hint,
+                                  compute_type=cfg["stt"].get("compute_type", "auto"),
+                                  speech_segments=speech_segments)
         
         # PII Redaction
         print("Step 3: PII Redaction")
         text = redact(text)
         
-        # NLP
+        # NLP: the model stages are independent and release the GIL, so run
+        # them side by side. Their own model calls go through _EX, hence a
+        # separate pool here.
         print("Step 4: Natural Language Processing")
-        summ = summarize(text)
-        kws = keywords(text)
-        sent = sentiment_score(text)
-        buckets = classify_buckets(text)
-        metrics = compute_metrics(buckets, cfg["weights_redflag"])
-        metrics["sentiment"] = sent
+        with ThreadPoolExecutor(max_workers=3) as ex:
+            f_summ = ex.submit(summarize, text)
+            f_kws = ex.submit(keywords, text)
+            f_sent = ex.submit(sentiment_score, text)
+            buckets = classify_buckets(text)
+            metrics = compute_metrics(buckets, cfg["weights_redflag"])
+            summ = f_summ.result()
+            kws = f_kws.result()
+            metrics["sentiment"] = f_sent.result()
         
         processing_time = time.time() - start_time
         print(f"Processing completed in {processing_time:.2f} seconds")
@@ -354,15 +370,4 @@ def process_audio_to_packet(wav_path: str, cfg: Dict, lang_hint="auto") -> Dict:
     except Exception as e:
         print(f"Processing error: {e}")
         # Return default values on error
-        return {
-            "transcript": f"Error processing audio: {str(e)}",
-            "summary": "Unable to process audio file",
-            "keywords": ["error", "processing"],
-            "buckets": {
-                "objections": {"Price": 0.0, "Stock": 0.0, "SizeFit": 0.0, "Quality": 0.0, "Knowledge": 0.0, "Process": 0.0},
-                "handling": {"Solution": 0.0, "Explanation": 0.0, "Other": 1.0},
-                "redflags": {"Disrespect": 0.0, "Inventory": 0.0, "Process": 0.0, "Knowledge": 0.0, "Team": 0.0}
-            },
-            "segments": [(0.0, 5.0)],
-            "metrics": {"red_flag_score": 0.0, "handling_Other": 100.0, "sentiment": 0.0},
-        }
+        return error_packet(f"Error processing audio: {str(e)}")
@@ -1,26 +1,67 @@
 import asyncio
+import contextlib
 import json
+import orjson
 import time
 import websockets
 import base64
 import io
-import tempfile
 import os
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 import uuid
 import logging
-from collections import defaultdict, deque
+import math
+import re
+from collections import Counter, defaultdict, deque
 import threading
 import queue
+import numpy as np
 
 from .agents import agent_manager, Priority, Task
-from .pipeline import transcribe_whisper, webrtc_vad_segments
+from .pipeline import WHISPER_NUM_WORKERS, cuda_device_count, transcribe_batch_segments, webrtc_vad_segments
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Clients stream raw mono int16 PCM at this rate
+SAMPLE_RATE = 16000
+
+# Word sets for the quick rule-based sentiment (matched as whole tokens)
+_POSITIVE_WORDS = frozenset({"good", "great", "excellent", "happy", "satisfied", "thank", "thanks", "please"})
+_NEGATIVE_WORDS = frozenset({"bad", "terrible", "awful", "angry", "frustrated", "disappointed", "problem", "problems"})
+_TOKEN_RE = re.compile(r"[a-z]+")
+_KEYWORD_RE = re.compile(r"[a-z]{4,}")
+
+# Confirmed text fed back to Whisper as context
+PROMPT_CHARS = 200
+
+def _norm_word(word: str) -> str:
+    # Hypotheses are compared ignoring case and edge punctuation
+    return word.strip(".,!?;:\"'").lower()
+
+def _pcm_to_ndarray(audio_data: bytes) -> np.ndarray:
+    """A chunk's PCM bytes as an int16 view (a trailing odd byte is dropped)"""
+    return np.frombuffer(audio_data, dtype=np.int16, count=len(audio_data) // 2)
+
+@dataclass(slots=True)
+class QualityMetrics:
+    """Running sums over a session's results; averages are derived when read"""
+    sum_confidence: float = 0.0
+    sum_processing_time: float = 0.0
+    total_chunks: int = 0
+    total_words: int = 0
+    
+    def summary(self) -> Dict[str, float]:
+        n = max(1, self.total_chunks)
+        return {
+            "avg_confidence": self.sum_confidence / n,
+            "total_chunks": self.total_chunks,
+            "avg_processing_time": self.sum_processing_time / n,
+            "total_words": self.total_words
+        }
+
+@dataclass(slots=True)
 class RealtimeSession:
     session_id: str
     interaction_id: str
@@ -28,13 +69,75 @@ class RealtimeSession:
     store_id: str
     language_hint: str = "auto"
     started_at: datetime = field(default_factory=datetime.now)
-    last_activity: datetime = field(default_factory=datetime.now)
-    audio_buffer: deque = field(default_factory=lambda: deque(maxlen=100))
+    last_activity: float = field(default_factory=time.monotonic)  # time.monotonic() seconds
+    # Ring buffer of the most recent PCM samples; samples_written counts
+    # every sample ever written, so reads can address absolute positions
+    pcm_ring: np.ndarray = field(default_factory=lambda: np.empty(20 * SAMPLE_RATE, dtype=np.int16))
+    write_idx: int = 0
+    samples_available: int = 0
+    samples_written: int = 0
+    chunk_count: int = 0
+    # Local agreement: audio before last_confirmed_sample has been committed
+    # to transcript_io; hypothesis holds the words heard after it last time
+    last_confirmed_sample: int = 0
+    # At most one queued or running processing task per session;
+    # processed_until is samples_written as of that task's read
+    processing_in_flight: bool = False
+    processed_until: int = 0
+    hypothesis: List[str] = field(default_factory=list)
+    # (word count, absolute end sample) of each closed Whisper segment in
+    # hypothesis, so a partial commit can stop on a segment boundary
+    hypothesis_ends: List[Tuple[int, int]] = field(default_factory=list)
+    # Whole confirmed transcript, appended to in place, plus its last
+    # PROMPT_CHARS characters for Whisper's previous-text prompt
+    transcript_io: io.StringIO = field(default_factory=io.StringIO)
+    confirmed_tail: str = ""
+    # Recent result packets, for client replay
     transcript_buffer: deque = field(default_factory=lambda: deque(maxlen=50))
     is_active: bool = True
     websocket: Optional[Any] = None
+    # Outgoing messages, drained by this connection's writer task
+    send_queue: Optional[asyncio.Queue] = None
+    writer_task: Optional[asyncio.Task] = None
     processing_tasks: List[str] = field(default_factory=list)
-    quality_metrics: Dict[str, float] = field(default_factory=dict)
+    quality_metrics: QualityMetrics = field(default_factory=QualityMetrics)
+    
+    def write_pcm(self, samples: np.ndarray):
+        """Append samples to the ring, overwriting the oldest ones"""
+        ring = self.pcm_ring
+        capacity = len(ring)
+        total = len(samples)
+        if total > capacity:
+            samples = samples[-capacity:]
+        n = len(samples)
+        idx = self.write_idx
+        first = min(n, capacity - idx)
+        np.copyto(ring[idx:idx + first], samples[:first])
+        np.copyto(ring[:n - first], samples[first:])
+        self.write_idx = (idx + n) % capacity
+        self.samples_available = min(capacity, self.samples_available + n)
+        self.samples_written += total
+    
+    def read_pcm(self, end: int, length: int) -> np.ndarray:
+        """Contiguous copy of up to `length` samples ending at absolute
+        position `end`, limited to what the ring still holds"""
+        capacity = len(self.pcm_ring)
+        start = max(end - length, self.samples_written - self.samples_available)
+        end = min(end, self.samples_written)
+        if end <= start:
+            return np.empty(0, dtype=np.int16)
+        s = start % capacity
+        n = end - start
+        if s + n <= capacity:
+            return self.pcm_ring[s:s + n].copy()
+        return np.concatenate((self.pcm_ring[s:], self.pcm_ring[:n - (capacity - s)]))
+    
+    @property
+    def buffered_chunks(self) -> int:
+        # How many average-sized chunks the ring currently holds
+        if not self.samples_written:
+            return 0
+        return round(self.samples_available * self.chunk_count / self.samples_written)
 
 class RealtimeProcessor:
     """Real-time audio processing and transcription system"""
@@ -43,60 +146,109 @@ class RealtimeProcessor:
         self.sessions: Dict[str, RealtimeSession] = {}
         self.audio_processors: Dict[str, asyncio.Task] = {}
         self.websocket_connections: Dict[str, Any] = {}
-        self.processing_queue = asyncio.Queue()
+        # Producers and workers all run on the event loop, so a plain deque
+        # plus an Event is enough; no asyncio.Queue futures per item
+        self.processing_queue: deque = deque()
+        self._has_work = asyncio.Event()  # Set while processing_queue may be non-empty
         self.result_queue = asyncio.Queue()
         self._running = False
-        self._processing_tasks: List[asyncio.Task] = []
+        self._supervisor: Optional[asyncio.Task] = None  # Owns the worker TaskGroup
         
         # Configuration
         self.config = {
             "chunk_duration_ms": 500,  # Process every 500ms
-            "buffer_size_seconds": 5,  # Keep 5 seconds of audio
+            # Keep 20 seconds of audio: unconfirmed audio is only released at
+            # the end of an agreed Whisper segment, so the ring must comfortably
+            # outlast one
+            "buffer_size_seconds": 20,
             "min_chunks_for_processing": 4,  # Process when we have 2 seconds of audio
             "max_processing_delay": 2.0,  # Max 2 second delay
+            "max_batch_size": 8,  # Sessions transcribed per worker batch
+            "bucket_seconds": 1.0,  # Clip-duration bin; one Whisper call per bin
+            "batch_window_ms": 20,  # How long a worker waits to fill a batch
             "quality_threshold": 0.7,
             "enable_voice_activity_detection": True,
+            "min_voiced_seconds": 0.4,  # Skip windows with less speech than this
+            "max_pending_sends": 64,  # Per-connection backlog before updates are dropped
             "enable_speaker_diarization": False,
             "enable_sentiment_analysis": True,
             "enable_keyword_extraction": True
         }
+        
+        # Settings read on every chunk, hoisted out of the config dict
+        self.min_chunks_for_processing = self.config["min_chunks_for_processing"]
+        self.max_batch_size = self.config["max_batch_size"]
+        self.batch_window = self.config["batch_window_ms"] / 1000
+        self.bucket_seconds = self.config["bucket_seconds"]
+        self.enable_vad = self.config["enable_voice_activity_detection"]
+        self.min_voiced_seconds = self.config["min_voiced_seconds"]
+        self.enable_sentiment_analysis = self.config["enable_sentiment_analysis"]
+        self.enable_keyword_extraction = self.config["enable_keyword_extraction"]
     
     async def start(self):
         """Start the real-time processor"""
         logger.info("Starting real-time processor")
         self._running = True
-        
-        # Start processing workers
-        for i in range(3):  # 3 processing workers
-            task = asyncio.create_task(self._processing_worker(f"worker-{i}"))
-            self._processing_tasks.append(task)
-        
-        # Start result handler
-        result_task = asyncio.create_task(self._result_handler())
-        self._processing_tasks.append(result_task)
-        
+        self._supervisor = asyncio.create_task(self._run_workers())
         logger.info("Real-time processor started successfully")
     
+    async def _run_workers(self):
+        """Run the background tasks in one TaskGroup; cancelling this task
+        cancels them all and waits for them to finish"""
+        async with asyncio.TaskGroup() as tg:
+            # Start processing workers
+            for i in range(self._detect_parallelism()):
+                tg.create_task(self._processing_worker(f"worker-{i}"))
+            
+            # Start result handler
+            tg.create_task(self._result_handler())
+            
+            # Warm the shared Whisper model in the background
+            tg.create_task(self._warmup())
+    
     async def stop(self):
         """Stop the real-time processor"""
         logger.info("Stopping real-time processor")
         self._running = False
         
-        # Cancel all processing tasks
-        for task in self._processing_tasks:
-            task.cancel()
-        
-        # Wait for tasks to complete
-        await asyncio.gather(*self._processing_tasks, return_exceptions=True)
+        # Cancel the workers and wait for them to unwind
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._supervisor
+            self._supervisor = None
         
         # Close all sessions
         for session in self.sessions.values():
             session.is_active = False
-            if session.websocket:
-                await session.websocket.close()
+            websocket = session.websocket
+            self.detach_websocket(session)
+            if websocket:
+                await websocket.close()
         
         logger.info("Real-time processor stopped")
     
+    def _detect_parallelism(self) -> int:
+        """Processing workers to run: one per batch the Whisper model can
+        execute at once. load_whisper puts a replica on every visible GPU,
+        each running WHISPER_NUM_WORKERS batches in parallel."""
+        n_gpus = cuda_device_count()
+        if n_gpus:
+            return n_gpus * WHISPER_NUM_WORKERS
+        return min(3, os.cpu_count() or 1)
+    
+    async def _warmup(self):
+        """Load the process-wide INT8 Whisper model and run one second of
+        silence through it, so the first session doesn't pay for model
+        loading and CTranslate2's first-call setup"""
+        try:
+            await asyncio.to_thread(
+                transcribe_batch_segments, [np.zeros(SAMPLE_RATE, dtype=np.float32)], ["en"]
+            )
+            logger.info("Real-time Whisper model warmed up")
+        except Exception as e:
+            logger.warning(f"Real-time Whisper warm-up failed, will load on first chunk: {e}")
+    
     async def create_session(self, interaction_id: str, user_id: str, store_id: str, 
                            language_hint: str = "auto") -> str:
         """Create a new real-time session"""
@@ -107,7 +259,8 @@ class RealtimeProcessor:
             interaction_id=interaction_id,
             user_id=user_id,
             store_id=store_id,
-            language_hint=language_hint
+            language_hint=language_hint,
+            pcm_ring=np.empty(self.config["buffer_size_seconds"] * SAMPLE_RATE, dtype=np.int16)
         )
         
         self.sessions[session_id] = session
@@ -117,7 +270,11 @@ class RealtimeProcessor:
     
     async def add_audio_chunk(self, session_id: str, audio_data: bytes, 
                             timestamp: Optional[float] = None) -> bool:
-        """Add audio chunk to a session"""
+        """Add audio chunk (raw 16 kHz int16 PCM) to a session.
+        
+        `timestamp` is the client's capture time; it isn't needed for
+        processing and is ignored.
+        """
         if session_id not in self.sessions:
             logger.error(f"Session {session_id} not found")
             return False
@@ -128,39 +285,66 @@ class RealtimeProcessor:
             return False
         
         # Add audio chunk to buffer
-        chunk_data = {
-            "data": audio_data,
-            "timestamp": timestamp or time.time(),
-            "size": len(audio_data)
-        }
-        
-        session.audio_buffer.append(chunk_data)
-        session.last_activity = datetime.now()
+        session.write_pcm(_pcm_to_ndarray(audio_data))
+        session.chunk_count += 1
+        session.last_activity = time.monotonic()
         
         # Check if we should trigger processing
-        if len(session.audio_buffer) >= self.config["min_chunks_for_processing"]:
+        if session.chunk_count >= self.min_chunks_for_processing:
             await self._trigger_processing(session_id)
         
         return True
     
     async def _trigger_processing(self, session_id: str):
         """Trigger processing for a session"""
-        session = self.sessions[session_id]
-        
-        # Combine recent audio chunks
-        audio_chunks = list(session.audio_buffer)
-        if not audio_chunks:
+        self._enqueue(self.sessions[session_id])
+    
+    def _enqueue(self, session: RealtimeSession):
+        # A task already queued or running will pick up the new audio, or
+        # re-queue the session when it finishes (see _release)
+        if not session.samples_available or session.processing_in_flight:
             return
+        session.processing_in_flight = True
         
-        # Create processing task
+        # Create processing task; the worker reads whatever the ring holds
+        # when it gets to it, so nothing about the audio is captured here
         processing_data = {
-            "session_id": session_id,
-            "audio_chunks": audio_chunks,
+            "session_id": session.session_id,
             "language_hint": session.language_hint,
             "timestamp": time.time()
         }
         
-        await self.processing_queue.put(processing_data)
+        self.processing_queue.append(processing_data)
+        self._has_work.set()
+    
+    def _release(self, batch: List[Dict[str, Any]]):
+        """Mark the batch's sessions idle, re-queueing any that received
+        audio after their task read the ring"""
+        for processing_data in batch:
+            session = self.sessions.get(processing_data["session_id"])
+            if session is None:
+                continue
+            session.processing_in_flight = False
+            if session.samples_written > session.processed_until:
+                self._enqueue(session)
+    
+    def _take_work(self, batch: List[Dict[str, Any]]):
+        """Move queued items into batch, up to max_batch_size, without awaiting.
+        
+        Items for a session already in the batch are merged into it: they
+        would all read the same, latest audio.
+        """
+        positions = {item["session_id"]: n for n, item in enumerate(batch)}
+        while len(batch) < self.max_batch_size:
+            try:
+                item = self.processing_queue.popleft()
+            except IndexError:
+                self._has_work.clear()
+                break
+            n = positions.get(item["session_id"])
+            if n is None:
+                positions[item["session_id"]] = len(batch)
+                batch.append(item)
     
     async def _processing_worker(self, worker_id: str):
         """Worker that processes audio chunks"""
@@ -168,109 +352,259 @@ class RealtimeProcessor:
         
         while self._running:
             try:
-                # Get processing data from queue
-                processing_data = await asyncio.wait_for(
-                    self.processing_queue.get(), 
-                    timeout=1.0
-                )
+                # Sleep until work is queued, then drain it in one go
+                await self._has_work.wait()
+                batch: List[Dict[str, Any]] = []
+                self._take_work(batch)
                 
-                session_id = processing_data["session_id"]
-                audio_chunks = processing_data["audio_chunks"]
-                language_hint = processing_data["language_hint"]
+                # Give other sessions the batch window to queue theirs, so
+                # they share one Whisper pass
+                if batch and len(batch) < self.max_batch_size:
+                    await asyncio.sleep(self.batch_window)
+                    self._take_work(batch)
+                if not batch:
+                    continue  # Another worker got there first
                 
                 # Process the audio
-                result = await self._process_audio_chunks(
-                    session_id, audio_chunks, language_hint
-                )
-                
-                if result:
-                    await self.result_queue.put(result)
+                try:
+                    for result in await self._process_batch(batch):
+                        if result:
+                            await self.result_queue.put(result)
+                finally:
+                    self._release(batch)
                 
-            except asyncio.TimeoutError:
-                continue
             except Exception as e:
                 logger.error(f"Error in processing worker {worker_id}: {e}")
                 await asyncio.sleep(0.1)
         
         logger.info(f"Processing worker {worker_id} stopped")
     
-    async def _process_audio_chunks(self, session_id: str, audio_chunks: List[Dict], 
-                                  language_hint: str) -> Optional[Dict[str, Any]]:
-        """Process audio chunks and return results"""
+    async def _process_batch(self, batch: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Transcribe a batch of processing_data items together; one result
+        (or None) per item, in order"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+        clips: Dict[int, np.ndarray] = {}
+        bases: Dict[int, int] = {}
+        prompts: Dict[int, str] = {}
+        for i, processing_data in enumerate(batch):
+            session = self.sessions.get(processing_data["session_id"])
+            if session is None:
+                continue
+            # Only the audio after the last confirmed point is re-decoded
+            end_sample = session.samples_written
+            session.processed_until = end_sample
+            audio = session.read_pcm(end_sample, end_sample - session.last_confirmed_sample)
+            clip_start = end_sample - len(audio)
+            if clip_start > session.last_confirmed_sample:
+                # The ring no longer holds the unconfirmed audio. Commit the
+                # hypothesis segments that ended before the oldest sample
+                # left; the rest is re-decoded (or was lost) from there
+                self._commit_overrun(session, clip_start)
+            if len(audio) < 500:  # Too small to process
+                continue
+            clips[i] = audio
+            bases[i] = clip_start
+            prompts[i] = session.confirmed_tail
+        
+        if not clips:
+            return results
+        
+        # Everything up to the transcript analysis runs as one stage in a
+        # worker thread, so websocket I/O keeps flowing meanwhile
+        indices = list(clips)
         try:
-            # Combine audio chunks
-            combined_audio = b''.join(chunk["data"] for chunk in audio_chunks)
-            
-            if len(combined_audio) < 1000:  # Too small to process
-                return None
-            
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-                tmp_file.write(combined_audio)
-                tmp_path = tmp_file.name
-            
+            analyses = await asyncio.to_thread(
+                self._analyze_clips,
+                [clips[i] for i in indices],
+                [batch[i]["language_hint"] for i in indices],
+                [prompts[i] for i in indices]
+            )
+        except Exception as e:
+            logger.error(f"Error processing batch of {len(indices)} clips: {e}")
+            return results
+        
+        for i, analysis in zip(indices, analyses):
+            if analysis is None:
+                continue
+            session_id = batch[i]["session_id"]
+            session = self.sessions.get(session_id)
+            if session is None or session.last_confirmed_sample != bases[i]:
+                continue  # Another result for this session already moved it on
             try:
-                # Transcribe audio
-                transcript = transcribe_whisper(
-                    tmp_path, 
-                    size="base", 
-                    device="auto", 
-                    lang_hint=language_hint
+                committed, pending = self._local_agreement(
+                    session, bases[i] + analysis["offset"], analysis["text_segments"]
                 )
-                
-                if not transcript or len(transcript.strip()) < 3:
-                    return None
-                
-                # Get VAD segments
-                segments = webrtc_vad_segments(tmp_path)
-                
-                # Calculate confidence
-                confidence = self._calculate_confidence(transcript, segments)
-                
-                # Create result
-                result = {
-                    "session_id": session_id,
-                    "transcript": transcript,
-                    "confidence": confidence,
-                    "segments": segments,
-                    "timestamp": time.time(),
-                    "is_partial": True,
-                    "audio_duration": sum(chunk["size"] for chunk in audio_chunks) / 16000,  # Rough estimate
-                    "word_count": len(transcript.split())
-                }
-                
-                # Add analysis if enabled
-                if self.config["enable_sentiment_analysis"]:
-                    sentiment_result = await self._quick_sentiment_analysis(transcript)
-                    result["sentiment"] = sentiment_result
-                
-                if self.config["enable_keyword_extraction"]:
-                    keywords = await self._quick_keyword_extraction(transcript)
-                    result["keywords"] = keywords
-                
-                return result
-                
-            finally:
-                # Clean up temp file
-                try:
-                    os.unlink(tmp_path)
-                except:
-                    pass
-                    
-        except Exception as e:
-            logger.error(f"Error processing audio chunks for session {session_id}: {e}")
+                results[i] = self._build_result(
+                    session_id, clips[i], analysis, committed, pending, batch[i]["timestamp"]
+                )
+            except Exception as e:
+                logger.error(f"Error processing audio chunks for session {session_id}: {e}")
+        return results
+    
+    def _analyze_clips(self, clips: List[np.ndarray], lang_hints: List[str],
+                       prompts: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """The fused per-batch stage, run off the event loop.
+        
+        For each int16 clip: VAD, skip it if too little is voiced, crop it
+        to the voiced span; then duration-bucketed batched Whisper; then
+        the quick sentiment/keyword analysis of the hypothesis. Returns a
+        dict per clip (None when skipped or its transcription failed).
+        """
+        out: List[Optional[Dict[str, Any]]] = [None] * len(clips)
+        speech: Dict[int, np.ndarray] = {}
+        for n, audio in enumerate(clips):
+            # VAD is far cheaper than Whisper: skip windows with too little
+            # speech, and only transcribe the span that has any
+            segments = webrtc_vad_segments(audio, SAMPLE_RATE)
+            bounds = np.asarray(segments, dtype=np.float64).reshape(-1, 2)
+            voiced = float((bounds[:, 1] - bounds[:, 0]).sum())
+            start = 0
+            if self.enable_vad:
+                if voiced < self.min_voiced_seconds:
+                    continue
+                pad = int(0.2 * SAMPLE_RATE)
+                start = max(0, int(segments[0][0] * SAMPLE_RATE) - pad)
+                end = min(len(audio), int(segments[-1][1] * SAMPLE_RATE) + pad)
+                audio = audio[start:end]
+            speech[n] = audio
+            out[n] = {"segments": segments, "voiced": voiced, "offset": start}
+        
+        # Bucket clips by duration: a batched decode runs until its longest
+        # output is done, so similar-length clips waste the fewest steps
+        buckets: Dict[int, List[int]] = defaultdict(list)
+        for n, audio in speech.items():
+            buckets[math.ceil(len(audio) / (self.bucket_seconds * SAMPLE_RATE))].append(n)
+        
+        for indices in buckets.values():
+            try:
+                transcripts = transcribe_batch_segments(
+                    [speech[n].astype(np.float32) / 32768.0 for n in indices],
+                    [lang_hints[n] for n in indices],
+                    size="base",
+                    device="auto",
+                    prompts=[prompts[n] for n in indices]
+                )
+            except Exception as e:
+                logger.error(f"Error transcribing batch of {len(indices)} clips: {e}")
+                for n in indices:
+                    out[n] = None
+                continue
+            
+            for n, text_segments in zip(indices, transcripts):
+                analysis = out[n]
+                analysis["text_segments"] = text_segments
+                hypothesis = " ".join(seg_text for _, _, seg_text in text_segments)
+                if self.enable_sentiment_analysis:
+                    analysis["sentiment"] = self._quick_sentiment_analysis(hypothesis)
+                if self.enable_keyword_extraction:
+                    analysis["keywords"] = self._quick_keyword_extraction(hypothesis)
+        return out
+    
+    def _commit(self, session: RealtimeSession, words: List[str], sample: int):
+        """Append words to the confirmed transcript and move the confirmed
+        point to absolute sample position `sample`"""
+        if words:
+            text = " ".join(words)
+            if session.transcript_io.tell():
+                text = " " + text
+            session.transcript_io.write(text)
+            session.confirmed_tail = (session.confirmed_tail + text)[-PROMPT_CHARS:]
+        session.last_confirmed_sample = sample
+        session.hypothesis = []
+        session.hypothesis_ends = []
+    
+    def _commit_overrun(self, session: RealtimeSession, clip_start: int):
+        """Move the confirmed point up to clip_start after the ring
+        overwrote unconfirmed audio, committing only the hypothesis words
+        whose segment ended at or before it; the rest of the stale
+        hypothesis is dropped, since the audio from clip_start on is
+        decoded again"""
+        count = 0
+        for n, end_sample in session.hypothesis_ends:
+            if end_sample > clip_start:
+                break
+            count = n
+        self._commit(session, session.hypothesis[:count], clip_start)
+    
+    def _local_agreement(self, session: RealtimeSession, clip_start: int,
+                         text_segments: List) -> Tuple[str, str]:
+        """Commit the words this hypothesis shares with the previous one.
+        
+        Whisper-Streaming style: the longest common word prefix of two
+        successive hypotheses is stable. The audio is only cut at the end
+        of a segment whose words are all in that prefix, so the next pass
+        starts on a segment boundary. Returns (committed, pending) text.
+        """
+        words: List[str] = []
+        boundaries = []  # (word count, segment end in seconds) per closed segment
+        for start, end, text in text_segments:
+            words.extend(text.split())
+            if end is not None:
+                boundaries.append((len(words), end))
+        
+        previous = session.hypothesis
+        agreed = 0
+        limit = min(len(previous), len(words))
+        while agreed < limit and _norm_word(previous[agreed]) == _norm_word(words[agreed]):
+            agreed += 1
+        
+        cut_words, cut_time = 0, None
+        for count, end in boundaries:
+            if count > agreed:
+                break
+            cut_words, cut_time = count, end
+        
+        if cut_time is not None:
+            self._commit(session, words[:cut_words], clip_start + int(cut_time * SAMPLE_RATE))
+        session.hypothesis = words[cut_words:]
+        session.hypothesis_ends = [
+            (count - cut_words, clip_start + int(end * SAMPLE_RATE))
+            for count, end in boundaries if count > cut_words
+        ]
+        return " ".join(words[:cut_words]), " ".join(session.hypothesis)
+    
+    def _build_result(self, session_id: str, audio: np.ndarray, analysis: Dict[str, Any],
+                      committed: str, pending: str, queued_at: float) -> Optional[Dict[str, Any]]:
+        """Result packet for one session's int16 audio and its _analyze_clips output.
+        
+        `transcript` is everything heard since the last confirmed point;
+        `confirmed` is the part of it that is now final.
+        """
+        transcript = " ".join(filter(None, (committed, pending)))
+        if not transcript or len(transcript.strip()) < 3:
             return None
+        
+        # Calculate confidence
+        confidence = self._calculate_confidence(transcript, analysis["voiced"])
+        
+        # Create result
+        result = {
+            "session_id": session_id,
+            "transcript": transcript,
+            "confirmed": committed,
+            "confidence": confidence,
+            "segments": analysis["segments"],
+            "timestamp": time.time(),
+            "is_partial": bool(pending),
+            "audio_duration": len(audio) / SAMPLE_RATE,
+            "word_count": committed.count(" ") + 1 if committed else 0,
+            "processing_time": time.time() - queued_at
+        }
+        # Add analysis if enabled
+        if "sentiment" in analysis:
+            result["sentiment"] = analysis["sentiment"]
+        if "keywords" in analysis:
+            result["keywords"] = analysis["keywords"]
+        
+        return result
     
-    async def _quick_sentiment_analysis(self, text: str) -> Dict[str, Any]:
+    def _quick_sentiment_analysis(self, text: str) -> Dict[str, Any]:
         """Quick sentiment analysis for real-time processing"""
         try:
             # Simple rule-based sentiment analysis for speed
-            positive_words = ["good", "great", "excellent", "happy", "satisfied", "thank", "please"]
-            negative_words = ["bad", "terrible", "awful", "angry", "frustrated", "disappointed", "problem"]
-            
-            text_lower = text.lower()
-            positive_count = sum(1 for word in positive_words if word in text_lower)
-            negative_count = sum(1 for word in negative_words if word in text_lower)
+            tokens = _TOKEN_RE.findall(text.lower())
+            positive_count = sum(1 for t in tokens if t in _POSITIVE_WORDS)
+            negative_count = sum(1 for t in tokens if t in _NEGATIVE_WORDS)
             
             if positive_count > negative_count:
                 sentiment = 0.3
@@ -290,24 +624,16 @@ class RealtimeProcessor:
         except:
             return {"score": 0.0, "category": "neutral", "confidence": 0.0}
     
-    async def _quick_keyword_extraction(self, text: str) -> List[str]:
+    def _quick_keyword_extraction(self, text: str) -> List[str]:
         """Quick keyword extraction for real-time processing"""
         try:
-            # Simple keyword extraction based on frequency
-            words = text.lower().split()
-            word_freq = {}
-            
-            for word in words:
-                if len(word) > 3:  # Only words longer than 3 characters
-                    word_freq[word] = word_freq.get(word, 0) + 1
-            
-            # Get top 5 most frequent words
-            keywords = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:5]
-            return [word for word, freq in keywords]
+            # Top 5 most frequent words longer than 3 characters
+            word_freq = Counter(_KEYWORD_RE.findall(text.lower()))
+            return [word for word, freq in word_freq.most_common(5)]
         except:
             return []
     
-    def _calculate_confidence(self, transcript: str, segments: List) -> float:
+    def _calculate_confidence(self, transcript: str, voiced_seconds: float) -> float:
         """Calculate confidence score for real-time transcription"""
         if not transcript or not transcript.strip():
             return 0.0
@@ -316,17 +642,15 @@ class RealtimeProcessor:
         confidence = 0.7
         
         # Adjust based on transcript length
-        word_count = len(transcript.split())
+        word_count = transcript.count(" ") + 1  # words are single-space joined
         if word_count > 10:
             confidence += 0.1
         if word_count > 20:
             confidence += 0.1
         
-        # Adjust based on audio duration
-        if segments:
-            audio_duration = sum(end - start for start, end in segments)
-            if audio_duration > 1.0:  # More than 1 second
-                confidence += 0.1
+        # Adjust based on voiced audio duration
+        if voiced_seconds > 1.0:  # More than 1 second
+            confidence += 0.1
         
         return min(0.95, confidence)
     
@@ -353,15 +677,17 @@ class RealtimeProcessor:
                     # Update quality metrics
                     self._update_session_metrics(session, result)
                     
-                    # Send to websocket if connected
-                    if session.websocket and not session.websocket.closed:
+                    # Hand off to the connection's writer, so a slow client
+                    # never holds up the other sessions
+                    if session.send_queue is not None:
+                        payload = orjson.dumps({
+                            "type": "transcript_update",
+                            "data": result
+                        }).decode()
                         try:
-                            await session.websocket.send(json.dumps({
-                                "type": "transcript_update",
-                                "data": result
-                            }))
-                        except Exception as e:
-                            logger.error(f"Error sending to websocket: {e}")
+                            session.send_queue.put_nowait(payload)
+                        except asyncio.QueueFull:
+                            logger.warning(f"Dropping transcript update for slow session {session_id}")
                 
             except asyncio.TimeoutError:
                 continue
@@ -371,29 +697,41 @@ class RealtimeProcessor:
         
         logger.info("Result handler stopped")
     
+    def attach_websocket(self, session: RealtimeSession, websocket: Any):
+        """Route a session's updates to websocket through its own writer task"""
+        self.detach_websocket(session)
+        session.websocket = websocket
+        session.send_queue = asyncio.Queue(maxsize=self.config["max_pending_sends"])
+        session.writer_task = asyncio.create_task(
+            self._session_writer(session.session_id, websocket, session.send_queue)
+        )
+    
+    def detach_websocket(self, session: RealtimeSession):
+        """Stop a session's writer task and forget its websocket"""
+        if session.writer_task is not None:
+            session.writer_task.cancel()
+        session.websocket = None
+        session.send_queue = None
+        session.writer_task = None
+    
+    async def _session_writer(self, session_id: str, websocket: Any, send_queue: asyncio.Queue):
+        """Send one connection's queued messages in order"""
+        try:
+            while True:
+                payload = await send_queue.get()
+                await websocket.send_text(payload)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error sending to websocket for session {session_id}: {e}")
+    
     def _update_session_metrics(self, session: RealtimeSession, result: Dict[str, Any]):
         """Update session quality metrics"""
-        if "quality_metrics" not in session.quality_metrics:
-            session.quality_metrics = {
-                "avg_confidence": 0.0,
-                "total_chunks": 0,
-                "avg_processing_time": 0.0,
-                "total_words": 0
-            }
-        
         metrics = session.quality_metrics
-        
-        # Update confidence
-        confidence = result.get("confidence", 0.0)
-        total_chunks = metrics["total_chunks"]
-        metrics["avg_confidence"] = (metrics["avg_confidence"] * total_chunks + confidence) / (total_chunks + 1)
-        
-        # Update word count
-        word_count = result.get("word_count", 0)
-        metrics["total_words"] += word_count
-        
-        # Update chunk count
-        metrics["total_chunks"] += 1
+        metrics.sum_confidence += result.get("confidence", 0.0)
+        metrics.sum_processing_time += result.get("processing_time", 0.0)
+        metrics.total_words += result.get("word_count", 0)
+        metrics.total_chunks += 1
     
     async def get_session_status(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get status of a real-time session"""
@@ -407,10 +745,12 @@ class RealtimeProcessor:
             "interaction_id": session.interaction_id,
             "is_active": session.is_active,
             "started_at": session.started_at.isoformat(),
-            "last_activity": session.last_activity.isoformat(),
-            "audio_buffer_size": len(session.audio_buffer),
+            "last_activity": datetime.fromtimestamp(
+                time.time() - (time.monotonic() - session.last_activity)
+            ).isoformat(),
+            "audio_buffer_size": session.buffered_chunks,
             "transcript_buffer_size": len(session.transcript_buffer),
-            "quality_metrics": session.quality_metrics,
+            "quality_metrics": session.quality_metrics.summary(),
             "processing_tasks": len(session.processing_tasks)
         }
     
@@ -431,28 +771,31 @@ class RealtimeProcessor:
         session.is_active = False
         
         # Process any remaining audio
-        if session.audio_buffer:
+        if session.samples_available:
             await self._trigger_processing(session_id)
             # Wait a bit for processing to complete
             await asyncio.sleep(1.0)
         
-        # Generate final transcript
+        # Generate final transcript: everything confirmed, plus whatever
+        # was still pending when the session ended
         final_transcript = " ".join(
-            chunk["transcript"] for chunk in session.transcript_buffer
+            filter(None, (session.transcript_io.getvalue(), " ".join(session.hypothesis)))
         )
         
         # Calculate final metrics
         final_metrics = {
             "total_duration": (datetime.now() - session.started_at).total_seconds(),
-            "total_chunks_processed": len(session.transcript_buffer),
-            "total_words": sum(chunk.get("word_count", 0) for chunk in session.transcript_buffer),
-            "avg_confidence": session.quality_metrics.get("avg_confidence", 0.0),
+            "total_chunks_processed": session.quality_metrics.total_chunks,
+            "total_words": len(final_transcript.split()),
+            "avg_confidence": session.quality_metrics.summary()["avg_confidence"],
             "final_transcript": final_transcript
         }
         
         # Clean up
-        if session.websocket:
-            await session.websocket.close()
+        websocket = session.websocket
+        self.detach_websocket(session)
+        if websocket:
+            await websocket.close()
         
         del self.sessions[session_id]
         
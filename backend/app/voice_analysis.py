@@ -3,10 +3,22 @@ import librosa
 import soundfile as sf
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
+import re
+import threading
 import tempfile
 import os
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from numba import njit
+except ImportError:  # numba is optional; segments are classified with NumPy instead
+    njit = None
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; language indicators fall back to substring checks
+    ahocorasick = None
+from .pipeline_common import resample
 
-@dataclass
+@dataclass(slots=True)
 class VoiceCharacteristics:
     pitch_mean: float
     pitch_std: float
@@ -19,7 +31,21 @@ class VoiceCharacteristics:
     voice_type: str  # "male", "female", "child", "unknown"
     confidence: float
 
-@dataclass
+# Returned whenever extraction fails; shared, so treat it as read-only
+_DEFAULT_CHARACTERISTICS = VoiceCharacteristics(
+    pitch_mean=0.0,
+    pitch_std=0.0,
+    energy_mean=0.0,
+    energy_std=0.0,
+    spectral_centroid=0.0,
+    mfcc_features=[0.0] * 13,
+    zero_crossing_rate=0.0,
+    speaking_rate=0.0,
+    voice_type="unknown",
+    confidence=0.0
+)
+
+@dataclass(slots=True)
 class SpeakerInfo:
     speaker_id: str
     voice_characteristics: VoiceCharacteristics
@@ -27,68 +53,238 @@ class SpeakerInfo:
     language: str
     confidence: float
 
+def _read_segment(f: sf.SoundFile, start_time: float, end_time: Optional[float], sample_rate: int) -> np.ndarray:
+    """Mono float32 samples between start_time and end_time (or the end of
+    the file) of an open SoundFile, at sample_rate"""
+    f.seek(min(int(start_time * f.samplerate), f.frames))
+    frames = max(int((end_time - start_time) * f.samplerate), 0) if end_time is not None else -1
+    y = f.read(frames, dtype="float32", always_2d=False)
+    if y.ndim > 1:
+        y = y.mean(axis=1)
+    if f.samplerate != sample_rate and len(y):
+        y = resample(y, f.samplerate, sample_rate)
+    return y
+
+# librosa's default STFT; feature frame t is centred on sample t * HOP_LENGTH
+HOP_LENGTH = 512
+N_FFT = 2048
+
+# Frames below this fraction of a segment's peak RMS count as silence for pitch
+VOICED_RMS_RATIO = 0.1
+
+# Runs YIN beside the STFT in _frame_features; shared by every analyzer and
+# call rather than starting a thread each time
+_EX = ThreadPoolExecutor(max_workers=4)
+
+# Code -> label for the arrays returned by _classify_segments
+VOICE_TYPES = ("male", "female", "child", "unknown")
+SPEAKER_ROLES = ("customer", "staff")
+ROLE_CUSTOMER, ROLE_STAFF = 0, 1
+_ROLE_CODES = {role: code for code, role in enumerate(SPEAKER_ROLES)}
+
+@dataclass(slots=True)
+class SpeakerBatch:
+    """Per-segment speaker values as parallel arrays, for whole-conversation
+    reductions; role holds SPEAKER_ROLES codes (-1 for any other role)"""
+    pitch_mean: np.ndarray
+    pitch_std: np.ndarray
+    energy_std: np.ndarray
+    confidence: np.ndarray
+    role: np.ndarray
+    
+    @classmethod
+    def from_infos(cls, speaker_infos: List[SpeakerInfo]) -> "SpeakerBatch":
+        n = len(speaker_infos)
+        def column(values, dtype=np.float64):
+            return np.fromiter(values, dtype=dtype, count=n)
+        return cls(
+            pitch_mean=column(s.voice_characteristics.pitch_mean for s in speaker_infos),
+            pitch_std=column(s.voice_characteristics.pitch_std for s in speaker_infos),
+            energy_std=column(s.voice_characteristics.energy_std for s in speaker_infos),
+            confidence=column(s.confidence for s in speaker_infos),
+            role=column((_ROLE_CODES.get(s.role, -1) for s in speaker_infos), np.int8)
+        )
+
+def _classify_segments_numpy(pitch_mean: np.ndarray, pitch_std: np.ndarray, energy_std: np.ndarray,
+                             speaking_rate: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(voice code, voice confidence, role code, role confidence) per segment,
+    by the rules of _classify_voice_type and _determine_speaker_role"""
+    voice = np.select([pitch_mean == 0, pitch_mean < 165, pitch_mean < 265], [3, 0, 1], 2).astype(np.int8)
+    centre = np.array([120.0, 220.0, 300.0, 0.0])[voice]
+    voice_conf = np.where(voice == 3, 0.0, np.minimum(0.9, 1.0 - np.abs(pitch_mean - centre) / 100))
+    role_conf = 0.5 + 0.2 * ((speaking_rate > 0) & (energy_std < 0.1)) - 0.1 * (pitch_std > 50)
+    role_conf[:1] += 0.3  # First speaker is often staff (greeting)
+    role = (np.arange(len(pitch_mean)) % 2 == 0).astype(np.int8)  # Alternate staff/customer
+    return voice, voice_conf, role, np.clip(role_conf, 0.1, 0.9)
+
+def _classify_segments_loop(pitch_mean, pitch_std, energy_std, speaking_rate):
+    # Same result as _classify_segments_numpy in one pass; only worth it compiled
+    n = pitch_mean.shape[0]
+    voice = np.empty(n, np.int8)
+    voice_conf = np.empty(n, np.float64)
+    role = np.empty(n, np.int8)
+    role_conf = np.empty(n, np.float64)
+    for i in range(n):
+        pm = pitch_mean[i]
+        if pm == 0:
+            voice[i] = 3
+            voice_conf[i] = 0.0
+        elif pm < 165:
+            voice[i] = 0
+            voice_conf[i] = min(0.9, 1.0 - abs(pm - 120) / 100)
+        elif pm < 265:
+            voice[i] = 1
+            voice_conf[i] = min(0.9, 1.0 - abs(pm - 220) / 100)
+        else:
+            voice[i] = 2
+            voice_conf[i] = min(0.9, 1.0 - abs(pm - 300) / 100)
+        
+        c = 0.5
+        if speaking_rate[i] > 0 and energy_std[i] < 0.1:
+            c += 0.2
+        if pitch_std[i] > 50:
+            c -= 0.1
+        if i == 0:
+            c += 0.3
+        role[i] = 1 if i % 2 == 0 else 0
+        role_conf[i] = min(0.9, max(0.1, c))
+    return voice, voice_conf, role, role_conf
+
+_classify_segments = njit(cache=True)(_classify_segments_loop) if njit is not None else _classify_segments_numpy
+
+# Longest stretch of audio analyze_speaker_segments decodes at once (a
+# single longer segment still gets a window of its own)
+ANALYSIS_WINDOW_SECONDS = 30.0
+
+def _segment_windows(segments: List[Tuple[float, float]], max_seconds: float):
+    """Group segment indices, in start order, into (start, end, indices)
+    windows spanning at most max_seconds"""
+    order = sorted(range(len(segments)), key=lambda i: segments[i][0])
+    members: List[int] = []
+    window_start = window_end = 0.0
+    for i in order:
+        start, end = segments[i]
+        if members and end - window_start > max_seconds:
+            yield window_start, window_end, members
+            members = []
+        if not members:
+            window_start, window_end = start, end
+        window_end = max(window_end, end)
+        members.append(i)
+    if members:
+        yield window_start, window_end, members
+
 class VoiceAnalyzer:
     def __init__(self):
         self.sample_rate = 16000
+        # librosa.feature.mfcc's own defaults, built once instead of per call
+        self.mel_basis = librosa.filters.mel(sr=self.sample_rate, n_fft=N_FFT, n_mels=128, dtype=np.float32)
+        # Scratch space for per-segment reductions; one set per thread, as
+        # the analyzer is shared
+        self._buffers = threading.local()
         
     def extract_voice_characteristics(self, audio_path: str, start_time: float = 0, end_time: Optional[float] = None) -> VoiceCharacteristics:
         """Extract comprehensive voice characteristics from audio segment"""
         try:
-            # Load audio
-            y, sr = librosa.load(audio_path, sr=self.sample_rate, offset=start_time, duration=end_time-start_time if end_time else None)
-            
+            # Load audio: seek straight to the segment instead of decoding up to it
+            with sf.SoundFile(audio_path) as f:
+                y = _read_segment(f, start_time, end_time, self.sample_rate)
+        except Exception as e:
+            print(f"Error extracting voice characteristics: {e}")
+            return self._default_characteristics()
+        return self.extract_voice_characteristics_from_array(y, self.sample_rate)
+    
+    def extract_voice_characteristics_from_array(self, y: np.ndarray, sr: int) -> VoiceCharacteristics:
+        """Extract voice characteristics from an already loaded mono segment"""
+        try:
             if len(y) == 0:
                 return self._default_characteristics()
-            
-            # Extract pitch (F0)
-            pitches, magnitudes = librosa.piptrack(y=y, sr=sr, threshold=0.1)
-            pitch_values = []
-            for t in range(pitches.shape[1]):
-                index = magnitudes[:, t].argmax()
-                pitch = pitches[index, t]
-                if pitch > 0:
-                    pitch_values.append(pitch)
-            
-            pitch_mean = np.mean(pitch_values) if pitch_values else 0
-            pitch_std = np.std(pitch_values) if pitch_values else 0
-            
-            # Extract energy
-            energy = librosa.feature.rms(y=y)[0]
-            energy_mean = np.mean(energy)
-            energy_std = np.std(energy)
-            
-            # Spectral centroid
-            spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=y, sr=sr))
-            
-            # MFCC features
-            mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-            mfcc_features = np.mean(mfccs, axis=1).tolist()
-            
-            # Zero crossing rate
-            zcr = np.mean(librosa.feature.zero_crossing_rate(y))
-            
-            # Speaking rate (approximate)
-            speaking_rate = len(y) / sr  # duration in seconds
-            
-            # Voice type classification based on pitch
-            voice_type, confidence = self._classify_voice_type(pitch_mean, pitch_std)
-            
-            return VoiceCharacteristics(
-                pitch_mean=float(pitch_mean),
-                pitch_std=float(pitch_std),
-                energy_mean=float(energy_mean),
-                energy_std=float(energy_std),
-                spectral_centroid=float(spectral_centroid),
-                mfcc_features=mfcc_features,
-                zero_crossing_rate=float(zcr),
-                speaking_rate=float(speaking_rate),
-                voice_type=voice_type,
-                confidence=confidence
-            )
+            y = np.asarray(y, dtype=np.float32)
+            return self._summarize(y, sr, self._frame_features(y, sr), 0, None)
         except Exception as e:
             print(f"Error extracting voice characteristics: {e}")
             return self._default_characteristics()
     
+    def _frame_features(self, y: np.ndarray, sr: int) -> Dict[str, np.ndarray]:
+        """Frame-level F0 (YIN), RMS, spectral centroid and MFCCs of a whole
+        signal, so a conversation's segments can share one pass (and one mel filterbank)"""
+        mel_basis = self.mel_basis
+        if sr != self.sample_rate:
+            mel_basis = librosa.filters.mel(sr=sr, n_fft=N_FFT, n_mels=128, dtype=np.float32)
+        # YIN and the STFT are independent and spend their time in NumPy's
+        # FFTs and array ops, which release the GIL, so run them side by side
+        f_f0 = _EX.submit(librosa.yin, y, fmin=50, fmax=500, sr=sr, frame_length=N_FFT, hop_length=HOP_LENGTH)
+        # One STFT feeds RMS, centroid and the mel spectrogram
+        magnitude = np.abs(librosa.stft(y, n_fft=N_FFT, hop_length=HOP_LENGTH))
+        features = {
+            "f0": f_f0.result(),
+            "rms": librosa.feature.rms(S=magnitude, frame_length=N_FFT)[0],
+            "centroid": librosa.feature.spectral_centroid(S=magnitude, sr=sr, n_fft=N_FFT)[0],
+            "mfcc": librosa.feature.mfcc(S=librosa.power_to_db(mel_basis @ magnitude ** 2), n_mfcc=13)
+        }
+        # Some of these come back float64; float32 is plenty for the
+        # per-segment means and halves the memory they're read from
+        return {k: v.astype(np.float32, copy=False) for k, v in features.items()}
+    
+    def _summarize(self, y: np.ndarray, sr: int, features: Dict[str, np.ndarray],
+                   start_frame: int, end_frame: Optional[int], classify: bool = True) -> VoiceCharacteristics:
+        """Characteristics of segment y, whose frames are [start_frame, end_frame) of features.
+        
+        With classify=False voice_type is left "unknown", for callers that
+        classify a whole batch of segments at once.
+        """
+        energy = features["rms"][start_frame:end_frame]
+        
+        # Extract pitch (F0), from voiced frames only: YIN reports a pitch
+        # for every frame, silence included
+        pitch_values = features["f0"][start_frame:end_frame]
+        voiced = energy > energy.max(initial=0.0) * VOICED_RMS_RATIO
+        pitch_values = pitch_values[voiced & np.isfinite(pitch_values) & (pitch_values > 0)]
+        
+        pitch_mean = pitch_values.mean() if pitch_values.size else 0
+        pitch_std = pitch_values.std() if pitch_values.size else 0
+        
+        # Extract energy
+        energy_mean = np.mean(energy)
+        energy_std = np.std(energy)
+        
+        # Spectral centroid
+        spectral_centroid = np.mean(features["centroid"][start_frame:end_frame])
+        
+        # MFCC features
+        mfcc_features = features["mfcc"][:, start_frame:end_frame].mean(axis=1, out=self._mfcc_buffer()).tolist()
+        
+        # Zero crossing rate: sign changes per sample, over the whole segment
+        zcr = np.count_nonzero(np.diff(np.signbit(y))) / max(1, len(y) - 1)
+        
+        # Speaking rate (approximate)
+        speaking_rate = len(y) / sr  # duration in seconds
+        
+        # Voice type classification based on pitch
+        voice_type, confidence = "unknown", 0.0
+        if classify:
+            voice_type, confidence = self._classify_voice_type(pitch_mean, pitch_std)
+        
+        return VoiceCharacteristics(
+            pitch_mean=float(pitch_mean),
+            pitch_std=float(pitch_std),
+            energy_mean=float(energy_mean),
+            energy_std=float(energy_std),
+            spectral_centroid=float(spectral_centroid),
+            mfcc_features=mfcc_features,
+            zero_crossing_rate=float(zcr),
+            speaking_rate=float(speaking_rate),
+            voice_type=voice_type,
+            confidence=confidence
+        )
+    
+    def _mfcc_buffer(self) -> np.ndarray:
+        """This thread's reusable 13-value buffer for MFCC means"""
+        buf = getattr(self._buffers, "mfcc_mean", None)
+        if buf is None:
+            buf = self._buffers.mfcc_mean = np.empty(13, dtype=np.float32)
+        return buf
+    
     def _classify_voice_type(self, pitch_mean: float, pitch_std: float) -> Tuple[str, float]:
         """Classify voice type based on pitch characteristics"""
         if pitch_mean == 0:
@@ -103,30 +299,58 @@ class VoiceAnalyzer:
             return "child", min(0.9, 1.0 - abs(pitch_mean - 300) / 100)
     
     def _default_characteristics(self) -> VoiceCharacteristics:
-        """Return default characteristics when extraction fails"""
-        return VoiceCharacteristics(
-            pitch_mean=0.0,
-            pitch_std=0.0,
-            energy_mean=0.0,
-            energy_std=0.0,
-            spectral_centroid=0.0,
-            mfcc_features=[0.0] * 13,
-            zero_crossing_rate=0.0,
-            speaking_rate=0.0,
-            voice_type="unknown",
-            confidence=0.0
-        )
+        """Return default characteristics when extraction fails (a shared
+        instance; don't modify it)"""
+        return _DEFAULT_CHARACTERISTICS
     
     def analyze_speaker_segments(self, audio_path: str, segments: List[Tuple[float, float]]) -> List[SpeakerInfo]:
         """Analyze voice characteristics for each speech segment"""
+        return self.analyze_speaker_batch(audio_path, segments)[0]
+    
+    def analyze_speaker_batch(self, audio_path: str,
+                              segments: List[Tuple[float, float]]) -> Tuple[List[SpeakerInfo], SpeakerBatch]:
+        """analyze_speaker_segments, plus the same results as a SpeakerBatch"""
         speaker_infos = []
         
-        for i, (start, end) in enumerate(segments):
-            # Extract voice characteristics
-            voice_chars = self.extract_voice_characteristics(audio_path, start, end)
-            
-            # Determine role based on voice characteristics and context
-            role, role_confidence = self._determine_speaker_role(voice_chars, i, len(segments))
+        # Decode the conversation a window at a time, each holding a run of
+        # nearby segments, so memory stays bounded on long calls; a window's
+        # frame features are computed in one pass and each segment slices
+        # out its samples and frames
+        all_chars = [self._default_characteristics()] * len(segments)
+        try:
+            f = sf.SoundFile(audio_path)
+        except Exception as e:
+            print(f"Error loading audio for voice analysis: {e}")
+            f = None
+        if f is not None:
+            with f:
+                for window_start, window_end, members in _segment_windows(segments, ANALYSIS_WINDOW_SECONDS):
+                    try:
+                        y = _read_segment(f, window_start, window_end, self.sample_rate)
+                        features = self._frame_features(y, self.sample_rate) if len(y) else None
+                    except Exception as e:
+                        print(f"Error loading audio for voice analysis: {e}")
+                        continue
+                    # Extract voice characteristics
+                    for i in members:
+                        start, end = segments[i]
+                        all_chars[i] = self._segment_characteristics(
+                            y, features, start - window_start, end - window_start
+                        )
+        
+        # Voice type and role for every segment in one call
+        pitch_mean = np.array([c.pitch_mean for c in all_chars], dtype=np.float64)
+        pitch_std = np.array([c.pitch_std for c in all_chars], dtype=np.float64)
+        energy_std = np.array([c.energy_std for c in all_chars], dtype=np.float64)
+        voice, voice_conf, role, role_conf = _classify_segments(
+            pitch_mean, pitch_std, energy_std,
+            np.array([c.speaking_rate for c in all_chars], dtype=np.float64)
+        )
+        
+        for i, voice_chars in enumerate(all_chars):
+            if voice_chars is not _DEFAULT_CHARACTERISTICS:  # Already "unknown", 0.0
+                voice_chars.voice_type = VOICE_TYPES[voice[i]]
+                voice_chars.confidence = float(voice_conf[i])
             
             # Determine language (will be enhanced with actual language detection)
             language = "auto"  # Placeholder for now
@@ -134,13 +358,36 @@ class VoiceAnalyzer:
             speaker_info = SpeakerInfo(
                 speaker_id=f"speaker_{i}",
                 voice_characteristics=voice_chars,
-                role=role,
+                role=SPEAKER_ROLES[role[i]],
                 language=language,
-                confidence=role_confidence
+                confidence=float(role_conf[i])
             )
             speaker_infos.append(speaker_info)
         
-        return speaker_infos
+        batch = SpeakerBatch(
+            pitch_mean=pitch_mean,
+            pitch_std=pitch_std,
+            energy_std=energy_std,
+            confidence=role_conf,
+            role=role
+        )
+        return speaker_infos, batch
+    
+    def _segment_characteristics(self, y_window: np.ndarray, features: Optional[Dict[str, np.ndarray]],
+                                 start: float, end: float) -> VoiceCharacteristics:
+        """Characteristics of the segment at [start, end) seconds into a decoded
+        window (defaults if that is empty)"""
+        sr = self.sample_rate
+        s0, s1 = int(start * sr), int(end * sr)
+        if features is None or s0 >= min(s1, len(y_window)):
+            return self._default_characteristics()
+        try:
+            start_frame = s0 // HOP_LENGTH
+            end_frame = max(start_frame + 1, s1 // HOP_LENGTH)
+            return self._summarize(y_window[s0:s1], sr, features, start_frame, end_frame, classify=False)
+        except Exception as e:
+            print(f"Error extracting voice characteristics: {e}")
+            return self._default_characteristics()
     
     def _determine_speaker_role(self, voice_chars: VoiceCharacteristics, segment_index: int, total_segments: int) -> Tuple[str, float]:
         """Determine if speaker is customer or staff based on voice characteristics and context"""
@@ -169,6 +416,35 @@ class VoiceAnalyzer:
         
         return role, min(0.9, max(0.1, confidence))
 
+# Indicator words per language for IndianLanguageDetector, matched as plain
+# substrings of the lowercased text
+_LANGUAGE_INDICATORS = {
+    'hi': ['है', 'हैं', 'का', 'की', 'के', 'में', 'पर', 'से', 'को', 'ने'],
+    'ta': ['ஆக', 'உள்ள', 'இருந்து', 'வரை', 'போது', 'முதல்', 'வரை'],
+    'te': ['లో', 'కు', 'నుండి', 'వరకు', 'పై', 'కోసం', 'గురించి'],
+    'bn': ['এ', 'তে', 'র', 'কে', 'হয়', 'আছে', 'থাকে', 'করতে']
+}
+
+def _build_indicator_automaton():
+    """One Aho-Corasick automaton over every indicator word"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for indicators in _LANGUAGE_INDICATORS.values():
+        for w in indicators:
+            automaton.add_word(w, w)
+    automaton.make_automaton()
+    return automaton
+
+_INDICATOR_AUTOMATON = _build_indicator_automaton()
+
+# Without pyahocorasick: a lookahead alternation reports the longest
+# indicator starting at each position, and _INDICATOR_PARTS adds the
+# shorter ones it contains (e.g. 'है' inside 'हैं')
+_ALL_INDICATORS = sorted({w for ws in _LANGUAGE_INDICATORS.values() for w in ws}, key=len, reverse=True)
+_INDICATOR_RE = re.compile("(?=(%s))" % "|".join(map(re.escape, _ALL_INDICATORS)))
+_INDICATOR_PARTS = {w: [v for v in _ALL_INDICATORS if v in w] for w in _ALL_INDICATORS}
+
 class IndianLanguageDetector:
     """Detector for Indian languages"""
     
@@ -198,27 +474,17 @@ class IndianLanguageDetector:
         # In production, use proper language detection models
         text_lower = text.lower()
         
-        # Hindi indicators
-        hindi_indicators = ['है', 'हैं', 'का', 'की', 'के', 'में', 'पर', 'से', 'को', 'ने']
-        hindi_score = sum(1 for indicator in hindi_indicators if indicator in text_lower)
-        
-        # Tamil indicators
-        tamil_indicators = ['ஆக', 'உள்ள', 'இருந்து', 'வரை', 'போது', 'முதல்', 'வரை']
-        tamil_score = sum(1 for indicator in tamil_indicators if indicator in text_lower)
-        
-        # Telugu indicators
-        telugu_indicators = ['లో', 'కు', 'నుండి', 'వరకు', 'పై', 'కోసం', 'గురించి']
-        telugu_score = sum(1 for indicator in telugu_indicators if indicator in text_lower)
-        
-        # Bengali indicators
-        bengali_indicators = ['এ', 'তে', 'র', 'কে', 'হয়', 'আছে', 'থাকে', 'করতে']
-        bengali_score = sum(1 for indicator in bengali_indicators if indicator in text_lower)
-        
+        # Single pass over the text finds every indicator; one indicator
+        # counts once however often it appears
+        if _INDICATOR_AUTOMATON is not None:
+            hits = {w for _, w in _INDICATOR_AUTOMATON.iter(text_lower)}
+        else:
+            hits = set()
+            for w in _INDICATOR_RE.findall(text_lower):
+                hits.update(_INDICATOR_PARTS[w])
         scores = {
-            'hi': hindi_score,
-            'ta': tamil_score,
-            'te': telugu_score,
-            'bn': bengali_score
+            lang: sum(1 for indicator in indicators if indicator in hits)
+            for lang, indicators in _LANGUAGE_INDICATORS.items()
         }
         
         if max(scores.values()) > 0:
@@ -255,9 +521,16 @@ class AdvancedInsightsGenerator:
                          sentiment: float, 
                          speaker_infos: List[SpeakerInfo],
                          keywords: List[str],
-                         metrics: Dict) -> List[Dict]:
-        """Generate intelligent insights from conversation data"""
+                         metrics: Dict,
+                         batch: Optional[SpeakerBatch] = None) -> List[Dict]:
+        """Generate intelligent insights from conversation data.
+        
+        `batch` is speaker_infos as a SpeakerBatch (from analyze_speaker_batch);
+        it is built here when not given.
+        """
         insights = []
+        if batch is None:
+            batch = SpeakerBatch.from_infos(speaker_infos)
         
         # Customer satisfaction insights
         if sentiment > 0.3:
@@ -278,9 +551,9 @@ class AdvancedInsightsGenerator:
             })
         
         # Staff performance insights
-        staff_segments = [s for s in speaker_infos if s.role == 'staff']
-        if staff_segments:
-            avg_confidence = np.mean([s.confidence for s in staff_segments])
+        staff_confidence = batch.confidence[batch.role == ROLE_STAFF]
+        if staff_confidence.size:
+            avg_confidence = float(staff_confidence.mean())
             if avg_confidence > 0.7:
                 insights.append({
                     'type': 'staff_performance',
@@ -297,7 +570,7 @@ class AdvancedInsightsGenerator:
                 'category': 'smooth',
                 'message': f"Multi-turn conversation with {len(speaker_infos)} speakers",
                 'confidence': 0.8,
-                'details': f"Roles: {', '.join(set(s.role for s in speaker_infos))}"
+                'details': f"Roles: {', '.join({s.role for s in speaker_infos})}"
             })
         
         # Red flag insights
@@ -0,0 +1 @@
+# Lets the tests import the backend as `app.*`, the way uvicorn loads it
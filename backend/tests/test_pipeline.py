@@ -0,0 +1,144 @@
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("soundfile")
+pytest.importorskip("phonenumbers")
+
+from app import pipeline
+
+
+def test_batched_clips_are_sample_indices():
+    clips = pipeline._batched_clips([(0.5, 2.25), (3.0, 3.0), (10.0, 75.5)])
+    assert clips == [
+        {"start": 8000, "end": 36000},
+        {"start": 160000, "end": 640000},
+        {"start": 640000, "end": 1120000},
+        {"start": 1120000, "end": 1208000},
+    ]
+    assert all(isinstance(v, int) for clip in clips for v in clip.values())
+    assert all(clip["end"] - clip["start"] <= 30 * 16000 for clip in clips)
+
+
+def test_batched_clips_slice_audio_through_collect_chunks():
+    vad = pytest.importorskip("faster_whisper.vad")
+    audio = np.arange(80 * 16000, dtype=np.float32)
+    segs = [(1.0, 2.5), (4.0, 70.0)]
+    chunks, metadata = vad.collect_chunks(audio, pipeline._batched_clips(segs))
+    spoken = np.concatenate(chunks)
+    expected = np.concatenate([audio[int(s * 16000):int(e * 16000)] for s, e in segs])
+    np.testing.assert_array_equal(spoken, expected)
+
+
+def _word_tokenizer(tmp_path, n_words):
+    tokenizers = pytest.importorskip("tokenizers")
+    from tokenizers import models, pre_tokenizers
+    vocab = {f"w{i}": i for i in range(n_words)}
+    vocab["<unk>"] = n_words
+    vocab["<pad>"] = n_words + 1
+    tokenizer = tokenizers.Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    # What an exported model directory ships: truncation to the model's 512 positions
+    tokenizer.enable_truncation(512)
+    tokenizer.enable_padding(pad_id=n_words + 1, pad_token="<pad>")
+    path = tmp_path / "tokenizer.json"
+    tokenizer.save(str(path))
+    return pipeline._FastTokenizer.from_file(str(path))
+
+
+def test_sentiment_chunks_cover_text_longer_than_model_window(tmp_path):
+    tokenizer = _word_tokenizer(tmp_path, 1300)
+    words = [f"w{i}" for i in range(1300)]
+    chunks, lengths = pipeline._sentiment_chunks(tokenizer, " ".join(words))
+    
+    assert len(chunks) > 1
+    assert max(lengths) <= pipeline.SENTIMENT_CHUNK_TOKENS
+    assert [len(c.split()) for c in chunks] == lengths
+    assert set(w for c in chunks for w in c.split()) == set(words)
+
+
+def test_memoize_text_skips_uncached_fallbacks():
+    calls = []
+    
+    @pipeline.memoize_text
+    def stage(text):
+        calls.append(text)
+        return pipeline.uncached("fallback") if len(calls) == 1 else ["model"]
+    
+    assert stage("same transcript") == "fallback"
+    assert stage("same transcript") == ["model"]
+    assert stage("same transcript") == ["model"]
+    assert len(calls) == 2
+
+
+def test_sentiment_without_model_is_not_cached(monkeypatch):
+    monkeypatch.setattr(pipeline, "load_sentiment", lambda: None)
+    assert pipeline.sentiment_score("a transcript scored without the model") == 0.0
+    
+    monkeypatch.setattr(pipeline, "load_sentiment", lambda: SimpleNamespace(tokenizer=None))
+    monkeypatch.setattr(pipeline, "_sentiment_chunks", lambda tokenizer, text: (["chunk"], [1]))
+    monkeypatch.setattr(pipeline._sentiment_batcher, "submit_sync",
+                        lambda request: [[{"label": "positive", "score": 1.0}]])
+    assert pipeline.sentiment_score("a transcript scored without the model") == 1.0
+
+
+def test_load_whisper_keeps_one_model_per_size_and_device(monkeypatch):
+    faster_whisper = pytest.importorskip("faster_whisper")
+    loaded = []
+    
+    class FakeModel:
+        def __init__(self, size, **kwargs):
+            loaded.append(size)
+    
+    monkeypatch.setattr(faster_whisper, "WhisperModel", FakeModel)
+    monkeypatch.setattr(faster_whisper, "BatchedInferencePipeline", lambda model: None)
+    monkeypatch.setattr(pipeline, "_whisper_models", {})
+    
+    base = pipeline.load_whisper()
+    small = pipeline.load_whisper(size="small", device="cpu")
+    assert small is not base
+    assert pipeline.load_whisper(size="small", device="cpu") is small
+    assert loaded == ["base", "small"]
+
+
+def test_load_whisper_honours_configured_compute_type(monkeypatch):
+    faster_whisper = pytest.importorskip("faster_whisper")
+    compute_types = []
+    
+    class FakeModel:
+        def __init__(self, size, compute_type, **kwargs):
+            compute_types.append(compute_type)
+    
+    monkeypatch.setattr(faster_whisper, "WhisperModel", FakeModel)
+    monkeypatch.setattr(faster_whisper, "BatchedInferencePipeline", lambda model: None)
+    monkeypatch.setattr(pipeline, "_whisper_models", {})
+    monkeypatch.setattr(pipeline, "cuda_device_count", lambda: 0)
+    
+    pipeline.load_whisper(device="cpu")
+    pipeline.load_whisper(device="cpu", compute_type="float32")
+    assert compute_types == ["int8", "float32"]
+
+
+class _ShortMemoryVad:
+    """Stands in for the Silero session: the score mixes the window (with its
+    context) and the previous window's, carried in the recurrent state"""
+    
+    def run(self, outputs, feeds):
+        level = np.abs(feeds["input"]).mean(axis=1)
+        state = feeds["state"].copy()
+        out = 0.5 * level + 0.5 * state[0, :, 0]
+        state[0, :, 0] = level
+        return out[:, None], state
+
+
+def test_silero_streams_match_a_single_sequential_pass(monkeypatch):
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-1.0, 1.0, 100 * pipeline.SILERO_WINDOW).astype(np.float32)
+    audio *= np.repeat(rng.uniform(0.0, 1.0, 100), pipeline.SILERO_WINDOW).astype(np.float32)
+    streamed = pipeline._silero_speech_flags(_ShortMemoryVad(), audio, 16000, threshold=0.25)
+    monkeypatch.setattr(pipeline, "SILERO_STREAMS", 1)
+    sequential = pipeline._silero_speech_flags(_ShortMemoryVad(), audio, 16000, threshold=0.25)
+    assert len(streamed) == 100
+    assert streamed.any() and not streamed.all()
+    np.testing.assert_array_equal(streamed, sequential)
@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("websockets")
+pytest.importorskip("soundfile")
+pytest.importorskip("phonenumbers")
+
+from app.realtime_processor import RealtimeProcessor, RealtimeSession, SAMPLE_RATE
+
+
+def test_ring_overrun_commits_only_segments_that_ended_before_the_clip():
+    processor = RealtimeProcessor()
+    session = RealtimeSession("s", "i", "u", "store")
+    processor._local_agreement(session, 0, [
+        (0.0, 2.0, "hello there"), (2.0, 6.0, "how are you"), (6.0, None, "today"),
+    ])
+    
+    # The ring now starts at 3 s: only "hello there" ended before that
+    processor._commit_overrun(session, 3 * SAMPLE_RATE)
+    assert session.transcript_io.getvalue() == "hello there"
+    assert session.last_confirmed_sample == 3 * SAMPLE_RATE
+    assert session.hypothesis == [] and session.hypothesis_ends == []
+    
+    # Re-decoding from 3 s must not repeat the committed words
+    processor._local_agreement(session, 3 * SAMPLE_RATE, [(0.0, 3.0, "how are you")])
+    processor._local_agreement(session, 3 * SAMPLE_RATE, [(0.0, 3.0, "how are you"), (3.0, None, "today")])
+    assert session.transcript_io.getvalue() == "hello there how are you"
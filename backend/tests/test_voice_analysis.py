@@ -0,0 +1,42 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+orjson = pytest.importorskip("orjson")
+pytest.importorskip("librosa")
+pytest.importorskip("soundfile")
+
+from app.voice_analysis import AdvancedInsightsGenerator, SpeakerBatch, SpeakerInfo, VoiceCharacteristics, _read_segment
+
+
+def _speaker(i, role, confidence):
+    characteristics = VoiceCharacteristics(
+        pitch_mean=180.0, pitch_std=20.0, energy_mean=0.1, energy_std=0.02,
+        spectral_centroid=1500.0, mfcc_features=[0.0] * 13, zero_crossing_rate=0.05,
+        speaking_rate=0.0, voice_type="female", confidence=confidence,
+    )
+    return SpeakerInfo(f"speaker_{i}", characteristics, role, "en", confidence)
+
+
+def test_upload_response_with_insights_serializes_without_numpy_support():
+    infos = [_speaker(0, "staff", 0.9), _speaker(1, "customer", 0.6), _speaker(2, "staff", 0.8)]
+    insights = AdvancedInsightsGenerator().generate_insights(
+        "thank you for your help", 0.5, infos, ["help"], {"red_flag_score": 0.7},
+        batch=SpeakerBatch.from_infos(infos),
+    )
+    
+    staff = [i for i in insights if i["type"] == "staff_performance"]
+    assert staff and type(staff[0]["confidence"]) is float
+    # The upload handler's ORJSONResponse body, minus the model outputs
+    body = orjson.loads(orjson.dumps({"id": "abc", "insights": insights}))
+    assert body["insights"][1]["confidence"] == pytest.approx(0.85)
+
+
+def test_read_segment_treats_zero_end_time_as_an_end(tmp_path):
+    sf = pytest.importorskip("soundfile")
+    path = str(tmp_path / "tone.wav")
+    sf.write(path, np.full(16000, 0.25, dtype=np.float32), 16000)
+    with sf.SoundFile(path) as f:
+        assert len(_read_segment(f, 0.0, 0.0, 16000)) == 0
+        assert len(_read_segment(f, 0.5, 0.25, 16000)) == 0
+        assert len(_read_segment(f, 0.25, 0.5, 16000)) == 4000
+        assert len(_read_segment(f, 0.5, None, 16000)) == 8000
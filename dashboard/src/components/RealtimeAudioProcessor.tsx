@@ -59,8 +59,8 @@ export const RealtimeAudioProcessor: React.FC<RealtimeAudioProcessorProps> = ({
   const [error, setError] = useState<string | null>(null);
   const [processingStatus, setProcessingStatus] = useState<'idle' | 'processing' | 'error'>('idle');
   
-  const mediaRecorderRef = useRef<MediaRecorder | null>(null);
-  const audioChunksRef = useRef<Blob[]>([]);
+  const audioContextRef = useRef<AudioContext | null>(null);
+  const processorRef = useRef<ScriptProcessorNode | null>(null);
   const websocketRef = useRef<WebSocket | null>(null);
   const sessionIdRef = useRef<string | null>(null);
   const streamRef = useRef<MediaStream | null>(null);
@@ -158,34 +158,40 @@ export const RealtimeAudioProcessor: React.FC<RealtimeAudioProcessorProps> = ({
       
       streamRef.current = stream;
       
-      const mediaRecorder = new MediaRecorder(stream, {
-        mimeType: 'audio/webm;codecs=opus'
-      });
+      // The server expects raw 16 kHz mono int16 PCM; the AudioContext
+      // resamples the microphone to 16 kHz
+      const audioContext = new AudioContext({ sampleRate: 16000 });
+      const source = audioContext.createMediaStreamSource(stream);
+      const processor = audioContext.createScriptProcessor(8192, 1, 1); // ~500ms per chunk
       
-      mediaRecorderRef.current = mediaRecorder;
-      audioChunksRef.current = [];
+      audioContextRef.current = audioContext;
+      processorRef.current = processor;
       
-      mediaRecorder.ondataavailable = (event) => {
-        if (event.data.size > 0) {
-          audioChunksRef.current.push(event.data);
+      processor.onaudioprocess = (event) => {
+        // Send audio chunk to server
+        if (websocketRef.current && websocketRef.current.readyState === WebSocket.OPEN) {
+          const samples = event.inputBuffer.getChannelData(0);
+          const pcm = new Int16Array(samples.length);
+          for (let i = 0; i < samples.length; i++) {
+            const s = Math.max(-1, Math.min(1, samples[i]));
+            pcm[i] = s < 0 ? s * 0x8000 : s * 0x7fff;
+          }
           
-          // Send audio chunk to server
-          if (websocketRef.current && websocketRef.current.readyState === WebSocket.OPEN) {
-            const reader = new FileReader();
-            reader.onload = () => {
-              const base64Data = (reader.result as string).split(',')[1];
-              websocketRef.current?.send(JSON.stringify({
-                type: 'audio_chunk',
-                data: base64Data,
-                timestamp: Date.now()
-              }));
-            };
-            reader.readAsDataURL(event.data);
+          const bytes = new Uint8Array(pcm.buffer);
+          let binary = '';
+          for (let i = 0; i < bytes.length; i++) {
+            binary += String.fromCharCode(bytes[i]);
           }
+          websocketRef.current.send(JSON.stringify({
+            type: 'audio_chunk',
+            data: btoa(binary),
+            timestamp: Date.now()
+          }));
         }
       };
       
-      mediaRecorder.start(500); // Send chunks every 500ms
+      source.connect(processor);
+      processor.connect(audioContext.destination);
       setIsRecording(true);
       setProcessingStatus('processing');
       
@@ -197,8 +203,11 @@ export const RealtimeAudioProcessor: React.FC<RealtimeAudioProcessorProps> = ({
 
   // Stop recording
   const stopRecording = useCallback(() => {
-    if (mediaRecorderRef.current && isRecording) {
-      mediaRecorderRef.current.stop();
+    if (processorRef.current && isRecording) {
+      processorRef.current.disconnect();
+      processorRef.current = null;
+      audioContextRef.current?.close();
+      audioContextRef.current = null;
       setIsRecording(false);
       setProcessingStatus('idle');
     }